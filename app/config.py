@@ -50,6 +50,8 @@ class Settings(BaseSettings):
     
     # OCR Configuration
     TESSERACT_PATH: Optional[str] = Field(default=None, env="TESSERACT_PATH")
+    OCR_BACKEND: str = Field(default="tesseract", env="OCR_BACKEND")  # tesseract or rapidocr
+    OCR_DEVICE: str = Field(default="cpu", env="OCR_DEVICE")  # cpu or cuda, for rapidocr
     
     # Communication Services
     TWILIO_ACCOUNT_SID: Optional[str] = Field(default=None, env="TWILIO_ACCOUNT_SID")
@@ -66,6 +68,8 @@ class Settings(BaseSettings):
     # EDI and Clearinghouse
     CLEARINGHOUSE_API_URL: Optional[str] = Field(default=None, env="CLEARINGHOUSE_API_URL")
     CLEARINGHOUSE_API_KEY: Optional[str] = Field(default=None, env="CLEARINGHOUSE_API_KEY")
+    # Coalesce concurrent eligibility checks into POSTs to {CLEARINGHOUSE_API_URL}/eligibility/batch
+    CLEARINGHOUSE_BATCH_ELIGIBILITY: bool = Field(default=False, env="CLEARINGHOUSE_BATCH_ELIGIBILITY")
     
     # EHR Integration
     FHIR_BASE_URL: Optional[str] = Field(default=None, env="FHIR_BASE_URL")
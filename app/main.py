@@ -23,6 +23,8 @@ from typing import Optional
 
 from app.config import settings
 from app.utils.logging import setup_logging, get_logger, SecurityLogger
+from app.utils.http import close_session
+from app.utils import loop as background_loop
 
 # Setup logging first
 setup_logging()
@@ -134,6 +136,8 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down AI Medical Billing System")
     if agent_orchestrator and hasattr(agent_orchestrator, 'shutdown'):
         await agent_orchestrator.shutdown()
+    await close_session()
+    await asyncio.to_thread(background_loop.shutdown)
     logger.info("System shutdown complete")
 
 
@@ -0,0 +1,151 @@
+"""
+Packed, memory-mapped lookup tables for ICD-10 and CPT code descriptions
+"""
+
+import bisect
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.logging import get_logger
+
+
+logger = get_logger("tools.code_tables")
+
+# Fixed-width code record: code (ASCII, NUL padded), description offset, description length
+_RECORD = struct.Struct("<8sII")
+
+CODES_SUFFIX = ".codes"
+DESCS_SUFFIX = ".descs"
+TERMS_SUFFIX = ".terms.json"
+
+
+class PackedCodeTable:
+    """Read-only code table backed by a sorted fixed-width index and a description blob.
+
+    Code lookups binary-search the index in place, so only the records that are
+    actually returned get decoded into Python objects. The buffers can be plain
+    bytes (built in memory) or read-only mmaps of compiled files.
+    """
+
+    def __init__(self, codes_buf, descs_buf, terms: Dict[str, List[int]]):
+        self._codes = codes_buf
+        self._descs = descs_buf
+        self._size = len(codes_buf) // _RECORD.size
+        self._keys = _RecordKeys(codes_buf, self._size)
+        self._terms: Tuple[Tuple[str, Tuple[int, ...]], ...] = tuple(
+            (term, tuple(indexes)) for term, indexes in terms.items()
+        )
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def from_groups(cls, groups: Dict[str, List[Dict[str, str]]]) -> "PackedCodeTable":
+        """Build an in-memory table from ``{term: [{"code", "description"}, ...]}``"""
+        codes_buf, descs_buf, terms = _pack(groups)
+        return cls(codes_buf, descs_buf, terms)
+
+    @classmethod
+    def open(cls, base_path: str) -> "PackedCodeTable":
+        """Memory-map a table previously written with :func:`compile_code_table`"""
+        base = Path(base_path)
+        codes_buf = _map_readonly(base.with_suffix(CODES_SUFFIX))
+        descs_buf = _map_readonly(base.with_suffix(DESCS_SUFFIX))
+        with open(base.with_suffix(TERMS_SUFFIX), "r", encoding="utf-8") as f:
+            terms = json.load(f)
+        return cls(codes_buf, descs_buf, terms)
+
+    def get(self, code: str) -> Optional[Dict[str, str]]:
+        """Exact code lookup"""
+        key = code.encode("ascii", "ignore")
+        index = bisect.bisect_left(self._keys, key)
+        if index < self._size and self._keys[index] == key:
+            return self._entry(index)
+        return None
+
+    def search(self, search_term: str) -> List[Dict[str, str]]:
+        """Return entries whose term contains, or is contained in, the search text"""
+        search_lower = search_term.lower()
+        results = []
+        for term, indexes in self._terms:
+            if search_lower in term or term in search_lower:
+                results.extend(self._entry(i) for i in indexes)
+        return results
+
+    def _entry(self, index: int) -> Dict[str, str]:
+        raw_code, offset, length = _RECORD.unpack_from(self._codes, index * _RECORD.size)
+        return {
+            "code": raw_code.rstrip(b"\0").decode("ascii"),
+            "description": bytes(self._descs[offset:offset + length]).decode("utf-8"),
+        }
+
+
+class _RecordKeys:
+    """Sequence view over the code column of a packed index, for ``bisect``"""
+
+    __slots__ = ("_buf", "_size")
+
+    def __init__(self, buf, size: int):
+        self._buf = buf
+        self._size = size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> bytes:
+        start = index * _RECORD.size
+        return bytes(self._buf[start:start + 8]).rstrip(b"\0")
+
+
+def _pack(groups: Dict[str, List[Dict[str, str]]]) -> Tuple[bytes, bytes, Dict[str, List[int]]]:
+    """Flatten grouped entries into (index bytes, description bytes, term postings)"""
+    descriptions: Dict[str, str] = {}
+    for entries in groups.values():
+        for entry in entries:
+            descriptions.setdefault(entry["code"], entry["description"])
+
+    ordered = sorted(descriptions)
+    position = {code: i for i, code in enumerate(ordered)}
+
+    index = bytearray()
+    blob = bytearray()
+    for code in ordered:
+        encoded = descriptions[code].encode("utf-8")
+        index += _RECORD.pack(code.encode("ascii"), len(blob), len(encoded))
+        blob += encoded
+
+    terms = {
+        term.lower(): [position[entry["code"]] for entry in entries]
+        for term, entries in groups.items()
+    }
+    return bytes(index), bytes(blob), terms
+
+
+def _map_readonly(path: Path):
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def compile_code_table(groups: Dict[str, List[Dict[str, str]]], base_path: str) -> None:
+    """Write the packed files for a code table next to ``base_path``"""
+    base = Path(base_path)
+    base.parent.mkdir(parents=True, exist_ok=True)
+    codes_buf, descs_buf, terms = _pack(groups)
+    base.with_suffix(CODES_SUFFIX).write_bytes(codes_buf)
+    base.with_suffix(DESCS_SUFFIX).write_bytes(descs_buf)
+    with open(base.with_suffix(TERMS_SUFFIX), "w", encoding="utf-8") as f:
+        json.dump(terms, f)
+    logger.info(f"Compiled code table with {len(codes_buf) // _RECORD.size} codes to {base}")
+
+
+def load_code_table(base_path: str, fallback: Dict[str, List[Dict[str, str]]]) -> PackedCodeTable:
+    """Memory-map the compiled table at ``base_path``, or pack ``fallback`` in memory"""
+    if Path(base_path).with_suffix(CODES_SUFFIX).exists():
+        try:
+            return PackedCodeTable.open(base_path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to open compiled code table {base_path}: {str(e)}")
+    return PackedCodeTable.from_groups(fallback)
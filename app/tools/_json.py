@@ -0,0 +1,11 @@
+"""
+Shared JSON serialization settings for tool results
+"""
+
+import orjson
+
+from app.config import settings
+
+
+# Tool results are read by agents, so they are only indented when debugging
+DUMP_OPTS = orjson.OPT_INDENT_2 if settings.DEBUG else 0
@@ -0,0 +1,45 @@
+"""
+Optional in-process OCR engine (RapidOCR on ONNX Runtime) for card and form images
+"""
+
+import importlib.util
+import threading
+from typing import Any, Optional, Tuple
+
+from app.utils.logging import get_logger
+from app.config import settings
+
+# Optional dependency - the OCR tools fall back to Tesseract without it. Only
+# probed here; ONNX Runtime is loaded when the engine is first used.
+rapidocr_available = importlib.util.find_spec("rapidocr_onnxruntime") is not None
+
+
+logger = get_logger("tools.ocr_engine")
+
+_engine: Optional[Any] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Any:
+    """Load the OCR models once per process; they stay resident between calls"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from rapidocr_onnxruntime import RapidOCR
+
+                use_cuda = settings.OCR_DEVICE == "cuda"
+                _engine = RapidOCR(det_use_cuda=use_cuda, cls_use_cuda=use_cuda, rec_use_cuda=use_cuda)
+                logger.info(f"Loaded RapidOCR engine on {'cuda' if use_cuda else 'cpu'}")
+    return _engine
+
+
+def recognize(image_path: str) -> Tuple[str, float]:
+    """OCR an image, returning its text lines and mean confidence on Tesseract's 0-100 scale"""
+    results, _ = get_engine()(image_path)
+    if not results:
+        return "", 0.0
+
+    text = "\n".join(line[1] for line in results)
+    confidence = sum(float(line[2]) for line in results) / len(results) * 100
+    return text, confidence
@@ -4,6 +4,7 @@ Medical Coding Tools for CrewAI agents with NLP and RAG capabilities
 
 import json
 import re
+from functools import lru_cache
 from typing import Dict, Any, List, Optional, Tuple
 from crewai_tools import BaseTool
 import torch
@@ -14,11 +15,60 @@ import numpy as np
 
 from app.utils.logging import get_logger
 from app.config import settings
+from app.tools._code_tables import PackedCodeTable, load_code_table
 
 
 logger = get_logger("tools.coding")
 
 
+# Sample code tables used when no compiled table exists at the configured path
+_ICD10_SAMPLE_CODES = {
+    "diabetes": [
+        {"code": "E11.9", "description": "Type 2 diabetes mellitus without complications"},
+        {"code": "E10.9", "description": "Type 1 diabetes mellitus without complications"},
+        {"code": "E11.21", "description": "Type 2 diabetes mellitus with diabetic nephropathy"}
+    ],
+    "hypertension": [
+        {"code": "I10", "description": "Essential (primary) hypertension"},
+        {"code": "I11.9", "description": "Hypertensive heart disease without heart failure"},
+        {"code": "I12.9", "description": "Hypertensive chronic kidney disease without heart failure"}
+    ],
+    "pneumonia": [
+        {"code": "J18.9", "description": "Pneumonia, unspecified organism"},
+        {"code": "J15.9", "description": "Unspecified bacterial pneumonia"},
+        {"code": "J12.9", "description": "Viral pneumonia, unspecified"}
+    ]
+}
+
+_CPT_SAMPLE_CODES = {
+    "office visit": [
+        {"code": "99213", "description": "Office visit, established patient, level 3"},
+        {"code": "99214", "description": "Office visit, established patient, level 4"},
+        {"code": "99203", "description": "Office visit, new patient, level 3"}
+    ],
+    "injection": [
+        {"code": "96372", "description": "Therapeutic injection, subcutaneous or intramuscular"},
+        {"code": "20610", "description": "Arthrocentesis, aspiration and injection, major joint"},
+        {"code": "11900", "description": "Injection, intralesional; up to and including 7 lesions"}
+    ],
+    "surgery": [
+        {"code": "27447", "description": "Total knee arthroplasty"},
+        {"code": "66984", "description": "Extracapsular cataract removal"},
+        {"code": "43239", "description": "Upper endoscopy, biopsy"}
+    ]
+}
+
+
+@lru_cache(maxsize=1)
+def _icd10_table() -> PackedCodeTable:
+    return load_code_table(settings.ICD10_DATABASE_PATH, _ICD10_SAMPLE_CODES)
+
+
+@lru_cache(maxsize=1)
+def _cpt_table() -> PackedCodeTable:
+    return load_code_table(settings.CPT_DATABASE_PATH, _CPT_SAMPLE_CODES)
+
+
 class MedicalCodingTool(BaseTool):
     """AI-powered tool for assigning medical codes to clinical documentation"""
     
@@ -408,39 +458,13 @@ class DiagnosisLookupTool(BaseTool):
     def _run(self, search_term: str) -> str:
         """Look up ICD-10 diagnosis codes"""
         try:
-            # Mock ICD-10 lookup - in production would query comprehensive database
-            icd10_codes = {
-                "diabetes": [
-                    {"code": "E11.9", "description": "Type 2 diabetes mellitus without complications"},
-                    {"code": "E10.9", "description": "Type 1 diabetes mellitus without complications"},
-                    {"code": "E11.21", "description": "Type 2 diabetes mellitus with diabetic nephropathy"}
-                ],
-                "hypertension": [
-                    {"code": "I10", "description": "Essential (primary) hypertension"},
-                    {"code": "I11.9", "description": "Hypertensive heart disease without heart failure"},
-                    {"code": "I12.9", "description": "Hypertensive chronic kidney disease without heart failure"}
-                ],
-                "pneumonia": [
-                    {"code": "J18.9", "description": "Pneumonia, unspecified organism"},
-                    {"code": "J15.9", "description": "Unspecified bacterial pneumonia"},
-                    {"code": "J12.9", "description": "Viral pneumonia, unspecified"}
-                ]
-            }
-            
-            search_lower = search_term.lower()
-            results = []
-            
-            # Search by description
-            for condition, codes in icd10_codes.items():
-                if search_lower in condition or condition in search_lower:
-                    results.extend(codes)
+            table = _icd10_table()
+            results = table.search(search_term)
             
             # Search by exact code
-            if search_term.upper() in ["E11.9", "I10", "J18.9"]:  # Sample exact matches
-                for codes in icd10_codes.values():
-                    for code in codes:
-                        if code["code"] == search_term.upper():
-                            results.append(code)
+            exact = table.get(search_term.upper())
+            if exact:
+                results.append(exact)
             
             result = {
                 "search_term": search_term,
@@ -469,39 +493,13 @@ class ProcedureLookupTool(BaseTool):
     def _run(self, search_term: str) -> str:
         """Look up CPT procedure codes"""
         try:
-            # Mock CPT lookup - in production would query comprehensive database
-            cpt_codes = {
-                "office visit": [
-                    {"code": "99213", "description": "Office visit, established patient, level 3"},
-                    {"code": "99214", "description": "Office visit, established patient, level 4"},
-                    {"code": "99203", "description": "Office visit, new patient, level 3"}
-                ],
-                "injection": [
-                    {"code": "96372", "description": "Therapeutic injection, subcutaneous or intramuscular"},
-                    {"code": "20610", "description": "Arthrocentesis, aspiration and injection, major joint"},
-                    {"code": "11900", "description": "Injection, intralesional; up to and including 7 lesions"}
-                ],
-                "surgery": [
-                    {"code": "27447", "description": "Total knee arthroplasty"},
-                    {"code": "66984", "description": "Extracapsular cataract removal"},
-                    {"code": "43239", "description": "Upper endoscopy, biopsy"}
-                ]
-            }
-            
-            search_lower = search_term.lower()
-            results = []
-            
-            # Search by description
-            for procedure_type, codes in cpt_codes.items():
-                if search_lower in procedure_type or procedure_type in search_lower:
-                    results.extend(codes)
+            table = _cpt_table()
+            results = table.search(search_term)
             
             # Search by exact code
-            if search_term in ["99213", "99214", "96372"]:  # Sample exact matches
-                for codes in cpt_codes.values():
-                    for code in codes:
-                        if code["code"] == search_term:
-                            results.append(code)
+            exact = table.get(search_term)
+            if exact:
+                results.append(exact)
             
             result = {
                 "search_term": search_term,
@@ -514,4 +512,4 @@ class ProcedureLookupTool(BaseTool):
         except Exception as e:
             error_msg = f"CPT lookup failed: {str(e)}"
             logger.error(error_msg)
-            return json.dumps({"error": error_msg}) 
\ No newline at end of file
+            return json.dumps({"error": error_msg})
\ No newline at end of file
@@ -2,117 +2,69 @@
 Communication and Collaboration Tools for CrewAI agents
 """
 
-import json
+import itertools
+import os
+import re
+import time
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from crewai_tools import BaseTool
+from jinja2 import DictLoader, Environment
 
 from app.utils.logging import get_logger
+from ._json import DUMP_OPTS
 
 
 logger = get_logger("tools.communication")
 
-
-class PatientCommunicationTool(BaseTool):
-    """Tool for patient communications including emails, SMS, and letters"""
-    
-    name: str = "Patient Communication System"
-    description: str = (
-        "Send communications to patients via email, SMS, or mail including appointment reminders, "
-        "billing statements, and educational materials. Input should be JSON with recipient_info, "
-        "message_type, and content_data. Returns delivery confirmation and tracking information."
-    )
-    
-    def _run(self, input_data: str) -> str:
-        """Send patient communication"""
-        try:
-            # Parse input data
-            if isinstance(input_data, str):
-                data = json.loads(input_data)
-            else:
-                data = input_data
-            
-            recipient_info = data.get("recipient_info", {})
-            message_type = data.get("message_type", "general")
-            content_data = data.get("content_data", {})
-            delivery_method = data.get("delivery_method", "email")
-            
-            if not recipient_info:
-                return json.dumps({"error": "Recipient information is required"})
-            
-            # Send communication
-            result = self._send_communication(recipient_info, message_type, content_data, delivery_method)
-            
-            logger.info(f"Communication sent: {message_type} to {recipient_info.get('patient_id', 'unknown')}")
-            return json.dumps(result, indent=2)
-            
-        except Exception as e:
-            error_msg = f"Communication sending failed: {str(e)}"
-            logger.error(error_msg)
-            return json.dumps({"error": error_msg})
-    
-    def _send_communication(self, recipient_info: Dict[str, Any], message_type: str,
-                          content_data: Dict[str, Any], delivery_method: str) -> Dict[str, Any]:
-        """Send communication through specified method"""
-        
-        # Generate message content based on type
-        content = self._generate_message_content(message_type, content_data, recipient_info)
-        
-        # Generate tracking ID
-        tracking_id = f"COMM{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        
-        # Mock delivery - in production would integrate with actual communication services
-        delivery_result = self._mock_delivery(recipient_info, content, delivery_method, tracking_id)
-        
-        return {
-            "tracking_id": tracking_id,
-            "message_type": message_type,
-            "delivery_method": delivery_method,
-            "recipient": recipient_info.get("patient_name", "Unknown"),
-            "sent_at": datetime.now().isoformat(),
-            "delivery_status": delivery_result.get("status", "pending"),
-            "content_preview": content.get("subject", "")[:50] + "...",
-            "delivery_details": delivery_result
-        }
-    
-    def _generate_message_content(self, message_type: str, content_data: Dict[str, Any],
-                                recipient_info: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate message content based on type and data"""
-        
-        patient_name = recipient_info.get("patient_name", "Patient")
-        
-        if message_type == "appointment_reminder":
-            return self._generate_appointment_reminder(content_data, patient_name)
-        elif message_type == "billing_statement":
-            return self._generate_billing_communication(content_data, patient_name)
-        elif message_type == "insurance_update":
-            return self._generate_insurance_update(content_data, patient_name)
-        elif message_type == "payment_reminder":
-            return self._generate_payment_reminder(content_data, patient_name)
-        elif message_type == "educational":
-            return self._generate_educational_content(content_data, patient_name)
-        else:
-            return self._generate_general_communication(content_data, patient_name)
-    
-    def _generate_appointment_reminder(self, content_data: Dict[str, Any], patient_name: str) -> Dict[str, Any]:
-        """Generate appointment reminder content"""
-        
-        appointment_date = content_data.get("appointment_date", "")
-        appointment_time = content_data.get("appointment_time", "")
-        provider_name = content_data.get("provider_name", "your healthcare provider")
-        location = content_data.get("location", "our clinic")
-        
-        return {
-            "subject": f"Appointment Reminder - {appointment_date}",
-            "body": f"""
-Dear {patient_name},
+# Bound once so the per-request clock read is a single global lookup
+_now = datetime.now
+
+# Largest recipients list accepted by a batch send
+MAX_BATCH_RECIPIENTS = 1000
+
+# Limits applied to agent-supplied JSON before it is parsed; the item limit
+# leaves room for a full recipients batch
+MAX_PAYLOAD_BYTES = 256 * 1024
+MAX_JSON_DEPTH = 16
+MAX_STRING_LENGTH = 65536
+MAX_CONTAINER_ITEMS = MAX_BATCH_RECIPIENTS
+
+# Tracking ID sequences. Seeded with the PID and start time (20 bits of
+# headroom per second) so IDs stay unique across workers and restarts;
+# next() on itertools.count is atomic under the GIL, so pool threads can share them.
+_ID_SEED = (os.getpid() << 52) | (int(time.time()) << 20)
+_comm_counter = itertools.count(_ID_SEED)
+_collab_counter = itertools.count(_ID_SEED)
+
+# Shared pool for fanning out batch deliveries; per-message time is dominated
+# by the provider round trip, so throughput scales with the worker count
+MAX_DELIVERY_WORKERS = 16
+_delivery_executor = ThreadPoolExecutor(
+    max_workers=MAX_DELIVERY_WORKERS, thread_name_prefix="patient-comm"
+)
+
+# Single characters the pre-parse scan acts on. Every match is one character,
+# so the scan never backtracks and stays linear in the payload size.
+_JSON_SPECIAL = re.compile(r'[\[\]{},"\\]')
+
+
+# Patient message templates, compiled once at import. Each message type has
+# a subject and a body; missing content_data keys fall back to the defaults
+# written into the template.
+_MESSAGE_TEMPLATES = {
+    "appointment_reminder.subject": "Appointment Reminder - {{ appointment_date | default('') }}",
+    "appointment_reminder.body": """\
+Dear {{ patient_name }},
 
 This is a reminder of your upcoming appointment:
 
-Date: {appointment_date}
-Time: {appointment_time}
-Provider: {provider_name}
-Location: {location}
+Date: {{ appointment_date | default('') }}
+Time: {{ appointment_time | default('') }}
+Provider: {{ provider_name | default('your healthcare provider') }}
+Location: {{ location | default('our clinic') }}
 
 Please arrive 15 minutes early to complete any necessary paperwork. 
 
@@ -121,28 +73,17 @@ If you need to reschedule, please call us at least 24 hours in advance.
 Contact us: (555) 123-4567
 
 Thank you,
-Healthcare Team
-            """.strip(),
-            "type": "appointment_reminder"
-        }
-    
-    def _generate_billing_communication(self, content_data: Dict[str, Any], patient_name: str) -> Dict[str, Any]:
-        """Generate billing-related communication"""
-        
-        amount_due = content_data.get("amount_due", 0.0)
-        due_date = content_data.get("due_date", "")
-        account_number = content_data.get("account_number", "")
-        
-        return {
-            "subject": f"Billing Statement - Account {account_number}",
-            "body": f"""
-Dear {patient_name},
+Healthcare Team""",
+
+    "billing_statement.subject": "Billing Statement - Account {{ account_number | default('') }}",
+    "billing_statement.body": """\
+Dear {{ patient_name }},
 
 Your billing statement is ready for review.
 
-Account Number: {account_number}
-Amount Due: ${amount_due:.2f}
-Due Date: {due_date}
+Account Number: {{ account_number | default('') }}
+Amount Due: ${{ '%.2f' | format(amount_due | default(0.0)) }}
+Due Date: {{ due_date | default('') }}
 
 You can view your full statement and make payments online at our patient portal.
 
@@ -154,30 +95,17 @@ Payment Options:
 If you have questions about your bill, please contact our billing department.
 
 Thank you,
-Billing Department
-            """.strip(),
-            "type": "billing_statement"
-        }
-    
-    def _generate_payment_reminder(self, content_data: Dict[str, Any], patient_name: str) -> Dict[str, Any]:
-        """Generate payment reminder content"""
-        
-        amount_due = content_data.get("amount_due", 0.0)
-        days_overdue = content_data.get("days_overdue", 0)
-        account_number = content_data.get("account_number", "")
-        
-        urgency_level = "urgent" if days_overdue > 60 else "standard"
-        
-        return {
-            "subject": f"Payment Reminder - Account {account_number}",
-            "body": f"""
-Dear {patient_name},
+Billing Department""",
+
+    "payment_reminder.subject": "Payment Reminder - Account {{ account_number | default('') }}",
+    "payment_reminder.body": """\
+Dear {{ patient_name }},
 
-This is a {"URGENT " if urgency_level == "urgent" else ""}payment reminder for your account.
+This is a {% if days_overdue | default(0) > 60 %}URGENT {% endif %}payment reminder for your account.
 
-Account Number: {account_number}
-Amount Due: ${amount_due:.2f}
-Days Past Due: {days_overdue}
+Account Number: {{ account_number | default('') }}
+Amount Due: ${{ '%.2f' | format(amount_due | default(0.0)) }}
+Days Past Due: {{ days_overdue | default(0) }}
 
 Please remit payment immediately to avoid any collection actions.
 
@@ -189,26 +117,16 @@ Payment Options:
 Contact our billing department to discuss payment arrangements: (555) 123-4567
 
 Thank you,
-Billing Department
-            """.strip(),
-            "type": "payment_reminder"
-        }
-    
-    def _generate_insurance_update(self, content_data: Dict[str, Any], patient_name: str) -> Dict[str, Any]:
-        """Generate insurance update communication"""
-        
-        update_type = content_data.get("update_type", "general")
-        insurance_company = content_data.get("insurance_company", "your insurance")
-        
-        return {
-            "subject": f"Insurance Update Required - {insurance_company}",
-            "body": f"""
-Dear {patient_name},
+Billing Department""",
+
+    "insurance_update.subject": "Insurance Update Required - {{ insurance_company | default('your insurance') }}",
+    "insurance_update.body": """\
+Dear {{ patient_name }},
 
 We need updated insurance information for your account.
 
-Current Issue: {update_type}
-Insurance Company: {insurance_company}
+Current Issue: {{ update_type | default('general') }}
+Insurance Company: {{ insurance_company | default('your insurance') }}
 
 Please provide:
 - Updated insurance card (front and back)
@@ -223,23 +141,13 @@ You can submit this information:
 Prompt submission helps ensure timely processing of your claims.
 
 Thank you,
-Insurance Verification Team
-            """.strip(),
-            "type": "insurance_update"
-        }
-    
-    def _generate_educational_content(self, content_data: Dict[str, Any], patient_name: str) -> Dict[str, Any]:
-        """Generate educational content"""
-        
-        topic = content_data.get("topic", "Healthcare")
-        resources = content_data.get("resources", [])
-        
-        return {
-            "subject": f"Health Education: {topic}",
-            "body": f"""
-Dear {patient_name},
+Insurance Verification Team""",
 
-We're sharing some educational information about {topic} that may be helpful for your health journey.
+    "educational.subject": "Health Education: {{ topic | default('Healthcare') }}",
+    "educational.body": """\
+Dear {{ patient_name }},
+
+We're sharing some educational information about {{ topic | default('Healthcare') }} that may be helpful for your health journey.
 
 Key Points:
 - Follow your provider's recommendations
@@ -247,217 +155,458 @@ Key Points:
 - Schedule regular follow-up appointments
 - Contact us with any questions
 
-Additional Resources:
-{chr(10).join(f"- {resource}" for resource in resources)}
+Additional Resources:{% for resource in resources | default([]) %}
+- {{ resource }}{% else %}
+{% endfor %}
 
 If you have questions about this information, please discuss with your provider at your next visit.
 
 Stay healthy,
-Your Healthcare Team
-            """.strip(),
-            "type": "educational"
-        }
-    
-    def _generate_general_communication(self, content_data: Dict[str, Any], patient_name: str) -> Dict[str, Any]:
-        """Generate general communication"""
-        
-        subject = content_data.get("subject", "Healthcare Communication")
-        message = content_data.get("message", "Thank you for choosing our healthcare services.")
-        
-        return {
-            "subject": subject,
-            "body": f"""
-Dear {patient_name},
+Your Healthcare Team""",
 
-{message}
+    "general.subject": "{{ subject | default('Healthcare Communication') }}",
+    "general.body": """\
+Dear {{ patient_name }},
+
+{{ message | default('Thank you for choosing our healthcare services.') }}
 
 If you have any questions, please don't hesitate to contact us at (555) 123-4567.
 
 Thank you,
-Healthcare Team
-            """.strip(),
-            "type": "general"
-        }
-    
-    def _mock_delivery(self, recipient_info: Dict[str, Any], content: Dict[str, Any],
-                      delivery_method: str, tracking_id: str) -> Dict[str, Any]:
-        """Mock communication delivery"""
-        
-        # Simulate delivery based on method
-        if delivery_method == "email":
-            return {
-                "status": "delivered",
-                "delivery_time": datetime.now().isoformat(),
-                "recipient_email": recipient_info.get("email", "patient@example.com"),
-                "delivery_method": "email",
-                "tracking_id": tracking_id
-            }
-        elif delivery_method == "sms":
-            return {
-                "status": "delivered",
-                "delivery_time": datetime.now().isoformat(),
-                "recipient_phone": recipient_info.get("phone", "(555) 123-4567"),
-                "delivery_method": "sms",
-                "tracking_id": tracking_id
-            }
-        elif delivery_method == "mail":
-            return {
-                "status": "processed",
-                "estimated_delivery": (datetime.now() + timedelta(days=3)).date().isoformat(),
-                "recipient_address": recipient_info.get("address", "123 Main St"),
-                "delivery_method": "mail",
-                "tracking_id": tracking_id
-            }
-        else:
-            return {
-                "status": "failed",
-                "error": f"Unsupported delivery method: {delivery_method}",
-                "tracking_id": tracking_id
-            }
+Healthcare Team""",
+}
+
+_template_env = Environment(
+    loader=DictLoader(_MESSAGE_TEMPLATES), auto_reload=False, cache_size=-1, autoescape=False
+)
+
+# message_type -> (subject, body) compiled templates
+_COMPILED_MESSAGES = {
+    name.rsplit(".", 1)[0]: (
+        _template_env.get_template(name),
+        _template_env.get_template(name.replace(".subject", ".body"))
+    )
+    for name in _MESSAGE_TEMPLATES
+    if name.endswith(".subject")
+}
 
+# Accepted request values; unsupported delivery methods are rejected before any
+# work is done, unknown message types are sent as a general communication
+_VALID_METHODS = frozenset({"email", "sms", "mail"})
+_VALID_MSG_TYPES = frozenset(_COMPILED_MESSAGES)
 
-class TeamCollaborationTool(BaseTool):
-    """Tool for internal team communications and task coordination"""
+
+class PayloadRejected(ValueError):
+    """Agent-supplied JSON exceeded one of the parse limits"""
+
+
+def _safe_parse(raw: str, max_depth: int = MAX_JSON_DEPTH, max_len: int = MAX_STRING_LENGTH,
+                max_items: int = MAX_CONTAINER_ITEMS) -> Any:
+    """Parse JSON after a single bounded scan; raises PayloadRejected if the payload exceeds a limit"""
+    # Characters never outnumber UTF-8 bytes, so only encode when it could matter
+    if len(raw) > MAX_PAYLOAD_BYTES or len(raw.encode()) > MAX_PAYLOAD_BYTES:
+        raise PayloadRejected(f"larger than {MAX_PAYLOAD_BYTES} bytes")
     
-    name: str = "Team Collaboration System"
-    description: str = (
-        "Facilitate internal team communications, task assignments, and workflow coordination. "
-        "Input should be JSON with collaboration_type, participants, and task_data. "
-        "Returns collaboration confirmation and tracking information."
-    )
+    # Item counts of the open containers, innermost last
+    open_items: List[int] = []
+    in_string = False
+    string_start = 0
+    # Position of the character made literal by the last backslash
+    escaped = -1
     
-    def _run(self, input_data: str) -> str:
-        """Coordinate team collaboration"""
-        try:
-            # Parse input data
-            if isinstance(input_data, str):
-                data = json.loads(input_data)
-            else:
-                data = input_data
-            
-            collaboration_type = data.get("collaboration_type", "task_assignment")
-            participants = data.get("participants", [])
-            task_data = data.get("task_data", {})
-            
-            if not participants:
-                return json.dumps({"error": "Participants are required"})
-            
-            # Process collaboration
-            result = self._process_collaboration(collaboration_type, participants, task_data)
-            
-            logger.info(f"Team collaboration initiated: {collaboration_type}")
-            return json.dumps(result, indent=2)
-            
-        except Exception as e:
-            error_msg = f"Team collaboration failed: {str(e)}"
-            logger.error(error_msg)
-            return json.dumps({"error": error_msg})
+    for match in _JSON_SPECIAL.finditer(raw):
+        pos = match.start()
+        if pos == escaped:
+            continue
+        char = raw[pos]
+        if in_string:
+            if char == "\\":
+                escaped = pos + 1
+            elif char == '"':
+                in_string = False
+                if pos - string_start - 1 > max_len:
+                    raise PayloadRejected(f"string longer than {max_len} characters")
+        elif char == '"':
+            in_string = True
+            string_start = pos
+        elif char in "{[":
+            if len(open_items) >= max_depth:
+                raise PayloadRejected(f"nested deeper than {max_depth} levels")
+            open_items.append(1)
+        elif char == ",":
+            if open_items:
+                open_items[-1] += 1
+                if open_items[-1] > max_items:
+                    raise PayloadRejected(f"more than {max_items} items in one array or object")
+        elif char in "}]" and open_items:
+            open_items.pop()
     
-    def _process_collaboration(self, collaboration_type: str, participants: List[str],
-                             task_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process team collaboration request"""
+    return orjson.loads(raw)
+
+
+def handle_patient_comm(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Send a patient communication, or a batch when ``recipients`` is given"""
+    try:
+        if "recipients" in data:
+            return _send_batch(data)
         
-        collaboration_id = f"COLLAB{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        recipient_info = data.get("recipient_info", {})
+        message_type = data.get("message_type", "general")
+        content_data = data.get("content_data", {})
+        delivery_method = data.get("delivery_method", "email")
         
-        if collaboration_type == "task_assignment":
-            return self._assign_task(participants, task_data, collaboration_id)
-        elif collaboration_type == "workflow_escalation":
-            return self._escalate_workflow(participants, task_data, collaboration_id)
-        elif collaboration_type == "case_review":
-            return self._initiate_case_review(participants, task_data, collaboration_id)
-        elif collaboration_type == "knowledge_sharing":
-            return self._share_knowledge(participants, task_data, collaboration_id)
-        else:
-            return {"error": f"Unknown collaboration type: {collaboration_type}"}
-    
-    def _assign_task(self, participants: List[str], task_data: Dict[str, Any],
-                    collaboration_id: str) -> Dict[str, Any]:
-        """Assign task to team members"""
+        if not recipient_info:
+            return {"error": "Recipient information is required"}
         
-        task_title = task_data.get("title", "New Task")
-        priority = task_data.get("priority", "medium")
-        due_date = task_data.get("due_date", (datetime.now() + timedelta(days=3)).date().isoformat())
+        if delivery_method not in _VALID_METHODS:
+            return {"error": f"Unsupported delivery method: {delivery_method}"}
         
-        return {
-            "collaboration_id": collaboration_id,
-            "type": "task_assignment",
-            "task": {
-                "title": task_title,
-                "priority": priority,
-                "due_date": due_date,
-                "assigned_to": participants,
-                "status": "assigned",
-                "created_at": datetime.now().isoformat()
-            },
-            "notifications_sent": len(participants),
-            "tracking_url": f"https://internal.healthcare.com/tasks/{collaboration_id}"
-        }
-    
-    def _escalate_workflow(self, participants: List[str], task_data: Dict[str, Any],
-                          collaboration_id: str) -> Dict[str, Any]:
-        """Escalate workflow to supervisors"""
+        # Send communication
+        result = _send_communication(recipient_info, message_type, content_data, delivery_method)
         
-        issue_type = task_data.get("issue_type", "general")
-        severity = task_data.get("severity", "medium")
-        patient_id = task_data.get("patient_id", "")
+        logger.info(f"Communication sent: {message_type} to {recipient_info.get('patient_id', 'unknown')}")
+        return result
         
-        return {
-            "collaboration_id": collaboration_id,
-            "type": "workflow_escalation",
-            "escalation": {
-                "issue_type": issue_type,
-                "severity": severity,
-                "patient_id": patient_id,
-                "escalated_to": participants,
-                "escalated_at": datetime.now().isoformat(),
-                "status": "pending_review"
-            },
-            "response_required": True,
-            "sla_deadline": (datetime.now() + timedelta(hours=4)).isoformat()
-        }
-    
-    def _initiate_case_review(self, participants: List[str], task_data: Dict[str, Any],
-                            collaboration_id: str) -> Dict[str, Any]:
-        """Initiate case review meeting"""
+    except Exception as e:
+        error_msg = f"Communication sending failed: {str(e)}"
+        logger.error(error_msg)
+        return {"error": error_msg}
+
+
+def _send_batch(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Send one message type to many recipients, delivering concurrently"""
+    try:
+        recipients = data.get("recipients", [])
+        message_type = data.get("message_type", "general")
+        content_data = data.get("content_data", {})
+        delivery_method = data.get("delivery_method", "email")
+        
+        if not recipients:
+            return {"error": "At least one recipient is required"}
+        
+        if len(recipients) > MAX_BATCH_RECIPIENTS:
+            return {"error": f"At most {MAX_BATCH_RECIPIENTS} recipients can be sent in one batch"}
         
-        patient_id = task_data.get("patient_id", "")
-        review_type = task_data.get("review_type", "complex_case")
+        if delivery_method not in _VALID_METHODS:
+            return {"error": f"Unsupported delivery method: {delivery_method}"}
         
+        def send(recipient_info: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                return _send_communication(recipient_info, message_type, content_data, delivery_method)
+            except Exception as e:
+                return {
+                    "recipient": (recipient_info.get("patient_name", "Unknown")
+                                  if isinstance(recipient_info, dict) else "Unknown"),
+                    "delivery_status": "failed",
+                    "error": str(e)
+                }
+        
+        results = list(_delivery_executor.map(send, recipients))
+        
+        logger.info(f"Batch communication sent: {message_type} to {len(recipients)} recipients")
         return {
-            "collaboration_id": collaboration_id,
-            "type": "case_review",
-            "review": {
-                "patient_id": patient_id,
-                "review_type": review_type,
-                "participants": participants,
-                "scheduled_for": (datetime.now() + timedelta(days=1)).isoformat(),
-                "status": "scheduled",
-                "agenda": [
-                    "Review patient history",
-                    "Discuss treatment options",
-                    "Coordinate care plan",
-                    "Address billing questions"
-                ]
-            },
-            "meeting_link": f"https://meet.healthcare.com/{collaboration_id}"
+            "message_type": message_type,
+            "delivery_method": delivery_method,
+            "total_recipients": len(recipients),
+            "results": results
         }
+        
+    except Exception as e:
+        error_msg = f"Batch communication sending failed: {str(e)}"
+        logger.error(error_msg)
+        return {"error": error_msg}
+
+
+def _send_communication(recipient_info: Dict[str, Any], message_type: str,
+                        content_data: Dict[str, Any], delivery_method: str) -> Dict[str, Any]:
+    """Send communication through specified method"""
+    
+    # Generate message content based on type
+    content = _generate_message_content(message_type, content_data, recipient_info)
+    
+    # Timestamp shared by every time field in the result
+    now = _now()
+    
+    # Generate tracking ID
+    tracking_id = f"COMM{next(_comm_counter):x}"
+    
+    # Mock delivery - in production would integrate with actual communication services
+    delivery_result = _mock_delivery(recipient_info, delivery_method, tracking_id, now)
+    
+    return {
+        "tracking_id": tracking_id,
+        "message_type": message_type,
+        "delivery_method": delivery_method,
+        "recipient": recipient_info.get("patient_name", "Unknown"),
+        "sent_at": now.isoformat(),
+        "delivery_status": delivery_result.get("status", "pending"),
+        "content_preview": content.get("subject", "")[:50] + "...",
+        "delivery_details": delivery_result
+    }
+
+
+def _generate_message_content(message_type: str, content_data: Dict[str, Any],
+                              recipient_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate message content based on type and data"""
+    
+    if message_type not in _VALID_MSG_TYPES:
+        message_type = "general"
+    
+    return _render(message_type, content_data, recipient_info.get("patient_name", "Patient"))
+
+
+def _render(message_type: str, content_data: Dict[str, Any], patient_name: str) -> Dict[str, Any]:
+    """Render the subject and body templates for a message type"""
     
-    def _share_knowledge(self, participants: List[str], task_data: Dict[str, Any],
-                        collaboration_id: str) -> Dict[str, Any]:
-        """Share knowledge or best practices"""
+    subject, body = _COMPILED_MESSAGES[message_type]
+    context = {**content_data, "patient_name": patient_name}
+    
+    return {
+        "subject": subject.render(context),
+        "body": body.render(context),
+        "type": message_type
+    }
+
+
+def _mock_delivery(recipient_info: Dict[str, Any], delivery_method: str,
+                   tracking_id: str, now: datetime) -> Dict[str, Any]:
+    """Mock communication delivery"""
+    
+    # Fields every delivery result carries; the per-method builders add the rest
+    base = {"tracking_id": tracking_id, "delivery_method": delivery_method}
+    
+    # Delivery methods are validated by the caller, so every method here has a handler
+    return _DELIVERY_HANDLERS[delivery_method](base, recipient_info, now)
+
+
+def _email_result(base: Dict[str, Any], recipient_info: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    return base | {
+        "status": "delivered",
+        "delivery_time": now.isoformat(),
+        "recipient_email": recipient_info.get("email", "patient@example.com")
+    }
+
+
+def _sms_result(base: Dict[str, Any], recipient_info: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    return base | {
+        "status": "delivered",
+        "delivery_time": now.isoformat(),
+        "recipient_phone": recipient_info.get("phone", "(555) 123-4567")
+    }
+
+
+def _mail_result(base: Dict[str, Any], recipient_info: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    return base | {
+        "status": "processed",
+        "estimated_delivery": (now + timedelta(days=3)).date().isoformat(),
+        "recipient_address": recipient_info.get("address", "123 Main St")
+    }
+
+
+# delivery_method -> mock provider result
+_DELIVERY_HANDLERS = {
+    "email": _email_result,
+    "sms": _sms_result,
+    "mail": _mail_result,
+}
+
+
+def handle_team_collab(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Coordinate team collaboration"""
+    try:
+        collaboration_type = data.get("collaboration_type", "task_assignment")
+        participants = data.get("participants", [])
+        task_data = data.get("task_data", {})
         
-        knowledge_type = task_data.get("knowledge_type", "best_practice")
-        topic = task_data.get("topic", "Healthcare Process")
+        if not participants:
+            return {"error": "Participants are required"}
         
-        return {
-            "collaboration_id": collaboration_id,
-            "type": "knowledge_sharing",
-            "knowledge": {
-                "type": knowledge_type,
-                "topic": topic,
-                "shared_with": participants,
-                "shared_at": datetime.now().isoformat(),
-                "status": "shared"
-            },
-            "access_link": f"https://knowledge.healthcare.com/{collaboration_id}"
-        } 
\ No newline at end of file
+        # Process collaboration
+        result = _process_collaboration(collaboration_type, participants, task_data)
+        
+        logger.info(f"Team collaboration initiated: {collaboration_type}")
+        return result
+        
+    except Exception as e:
+        error_msg = f"Team collaboration failed: {str(e)}"
+        logger.error(error_msg)
+        return {"error": error_msg}
+
+
+def _process_collaboration(collaboration_type: str, participants: List[str],
+                           task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Process team collaboration request"""
+    
+    now = _now()
+    collaboration_id = f"COLLAB{next(_collab_counter):x}"
+    
+    handler = _COLLABORATION_HANDLERS.get(collaboration_type)
+    if handler is None:
+        return {"error": f"Unknown collaboration type: {collaboration_type}"}
+    return handler(participants, task_data, collaboration_id, now)
+
+
+def _assign_task(participants: List[str], task_data: Dict[str, Any],
+                 collaboration_id: str, now: datetime) -> Dict[str, Any]:
+    """Assign task to team members"""
+    
+    task_title = task_data.get("title", "New Task")
+    priority = task_data.get("priority", "medium")
+    due_date = task_data.get("due_date", (now + timedelta(days=3)).date().isoformat())
+    
+    return {
+        "collaboration_id": collaboration_id,
+        "type": "task_assignment",
+        "task": {
+            "title": task_title,
+            "priority": priority,
+            "due_date": due_date,
+            "assigned_to": participants,
+            "status": "assigned",
+            "created_at": now.isoformat()
+        },
+        "notifications_sent": len(participants),
+        "tracking_url": f"https://internal.healthcare.com/tasks/{collaboration_id}"
+    }
+
+
+def _escalate_workflow(participants: List[str], task_data: Dict[str, Any],
+                       collaboration_id: str, now: datetime) -> Dict[str, Any]:
+    """Escalate workflow to supervisors"""
+    
+    issue_type = task_data.get("issue_type", "general")
+    severity = task_data.get("severity", "medium")
+    patient_id = task_data.get("patient_id", "")
+    
+    return {
+        "collaboration_id": collaboration_id,
+        "type": "workflow_escalation",
+        "escalation": {
+            "issue_type": issue_type,
+            "severity": severity,
+            "patient_id": patient_id,
+            "escalated_to": participants,
+            "escalated_at": now.isoformat(),
+            "status": "pending_review"
+        },
+        "response_required": True,
+        "sla_deadline": (now + timedelta(hours=4)).isoformat()
+    }
+
+
+def _initiate_case_review(participants: List[str], task_data: Dict[str, Any],
+                          collaboration_id: str, now: datetime) -> Dict[str, Any]:
+    """Initiate case review meeting"""
+    
+    patient_id = task_data.get("patient_id", "")
+    review_type = task_data.get("review_type", "complex_case")
+    
+    return {
+        "collaboration_id": collaboration_id,
+        "type": "case_review",
+        "review": {
+            "patient_id": patient_id,
+            "review_type": review_type,
+            "participants": participants,
+            "scheduled_for": (now + timedelta(days=1)).isoformat(),
+            "status": "scheduled",
+            "agenda": [
+                "Review patient history",
+                "Discuss treatment options",
+                "Coordinate care plan",
+                "Address billing questions"
+            ]
+        },
+        "meeting_link": f"https://meet.healthcare.com/{collaboration_id}"
+    }
+
+
+def _share_knowledge(participants: List[str], task_data: Dict[str, Any],
+                     collaboration_id: str, now: datetime) -> Dict[str, Any]:
+    """Share knowledge or best practices"""
+    
+    knowledge_type = task_data.get("knowledge_type", "best_practice")
+    topic = task_data.get("topic", "Healthcare Process")
+    
+    return {
+        "collaboration_id": collaboration_id,
+        "type": "knowledge_sharing",
+        "knowledge": {
+            "type": knowledge_type,
+            "topic": topic,
+            "shared_with": participants,
+            "shared_at": now.isoformat(),
+            "status": "shared"
+        },
+        "access_link": f"https://knowledge.healthcare.com/{collaboration_id}"
+    }
+
+
+# collaboration_type -> handler
+_COLLABORATION_HANDLERS = {
+    "task_assignment": _assign_task,
+    "workflow_escalation": _escalate_workflow,
+    "case_review": _initiate_case_review,
+    "knowledge_sharing": _share_knowledge,
+}
+
+# Tool name -> handler, for callers that want to skip the CrewAI wrapper
+TOOL_HANDLERS = {
+    "patient_comm": handle_patient_comm,
+    "team_collab": handle_team_collab,
+}
+
+
+def _run_handler(handler, input_data: Any, failure: str) -> str:
+    """Parse tool input, call the handler and serialise its result"""
+    if isinstance(input_data, str):
+        try:
+            data = _safe_parse(input_data)
+        except PayloadRejected as e:
+            logger.warning(f"Rejected input payload: {str(e)}")
+            return orjson.dumps({"error": f"payload rejected: {str(e)}"}).decode()
+        except Exception as e:
+            error_msg = f"{failure}: {str(e)}"
+            logger.error(error_msg)
+            return orjson.dumps({"error": error_msg}).decode()
+    else:
+        data = input_data
+    
+    if not isinstance(data, dict):
+        return orjson.dumps({"error": f"{failure}: input must be a JSON object"}).decode()
+    
+    result = handler(data)
+    if "error" in result:
+        return orjson.dumps(result).decode()
+    return orjson.dumps(result, option=DUMP_OPTS).decode()
+
+
+class PatientCommunicationTool(BaseTool):
+    """Tool for patient communications including emails, SMS, and letters"""
+    
+    name: str = "Patient Communication System"
+    description: str = (
+        "Send communications to patients via email, SMS, or mail including appointment reminders, "
+        "billing statements, and educational materials. Input should be JSON with recipient_info, "
+        "message_type, and content_data; pass a recipients list instead of recipient_info to send "
+        "the same message to many patients. Returns delivery confirmation and tracking information."
+    )
+    
+    def _run(self, input_data: str) -> str:
+        """Send patient communication"""
+        return _run_handler(handle_patient_comm, input_data, "Communication sending failed")
+
+
+class TeamCollaborationTool(BaseTool):
+    """Tool for internal team communications and task coordination"""
+    
+    name: str = "Team Collaboration System"
+    description: str = (
+        "Facilitate internal team communications, task assignments, and workflow coordination. "
+        "Input should be JSON with collaboration_type, participants, and task_data. "
+        "Returns collaboration confirmation and tracking information."
+    )
+    
+    def _run(self, input_data: str) -> str:
+        """Coordinate team collaboration"""
+        return _run_handler(handle_team_collab, input_data, "Team collaboration failed")
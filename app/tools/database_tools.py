@@ -2,253 +2,407 @@
 Database Tools for CrewAI agents to access patient, claim, and insurance data
 """
 
-import json
-from typing import Dict, Any, List, Optional
+import time
+import orjson
+from collections import defaultdict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, ClassVar, Dict, Any, Final, List, Mapping, Optional, Tuple
 from datetime import datetime
 from crewai_tools import BaseTool
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
 
 from app.utils.logging import get_logger
-from app.config import settings
-from app.models.patient import Patient
-from app.models.claim import Claim, Insurance
+from ._json import DUMP_OPTS
 
 
 logger = get_logger("tools.database")
 
+# Distinct search strings remembered per process across all lookup tools, and
+# how long a remembered match (or miss) may be reused
+LOOKUP_CACHE_SIZE = 1024
+LOOKUP_CACHE_TTL_SECONDS = 300
 
-class PatientLookupTool(BaseTool):
-    """Tool for looking up patient information"""
-    
-    name: str = "Patient Database Lookup"
-    description: str = (
-        "Look up patient information from the database. "
-        "Input should be patient ID, name, or other identifying information. "
-        "Returns patient demographics and insurance information."
+
+# Mock databases, read-only - in production these lookups would query the actual database
+_PATIENTS: Final[Mapping[str, Dict[str, Any]]] = MappingProxyType({
+    "P001": {
+        "patient_id": "P001",
+        "first_name": "John",
+        "last_name": "Smith",
+        "date_of_birth": "1980-05-15",
+        "gender": "M",
+        "ssn": "***-**-1234",
+        "phone": "(555) 123-4567",
+        "email": "john.smith@email.com",
+        "address": {
+            "street": "123 Main St",
+            "city": "Anytown",
+            "state": "CA",
+            "zip_code": "90210"
+        },
+        "insurance": {
+            "primary": {
+                "insurance_id": "INS001",
+                "member_id": "MB123456789",
+                "payer_name": "Blue Cross Blue Shield",
+                "group_number": "GRP001",
+                "effective_date": "2024-01-01",
+                "termination_date": "2024-12-31"
+            }
+        },
+        "emergency_contact": {
+            "name": "Jane Smith",
+            "relationship": "Spouse",
+            "phone": "(555) 123-4568"
+        }
+    },
+    "P002": {
+        "patient_id": "P002", 
+        "first_name": "Mary",
+        "last_name": "Johnson",
+        "date_of_birth": "1975-09-22",
+        "gender": "F",
+        "ssn": "***-**-5678",
+        "phone": "(555) 987-6543",
+        "email": "mary.johnson@email.com",
+        "address": {
+            "street": "456 Oak Ave",
+            "city": "Springfield",
+            "state": "NY",
+            "zip_code": "12345"
+        },
+        "insurance": {
+            "primary": {
+                "insurance_id": "INS002",
+                "member_id": "MB987654321",
+                "payer_name": "Aetna",
+                "group_number": "GRP002",
+                "effective_date": "2024-01-01",
+                "termination_date": "2024-12-31"
+            }
+        }
+    }
+})
+
+_CLAIMS: Final[Mapping[str, Dict[str, Any]]] = MappingProxyType({
+    "CLM001": {
+        "claim_id": "CLM001",
+        "patient_id": "P001",
+        "service_date": "2024-01-15",
+        "provider_id": "PRV001",
+        "diagnosis_codes": ["E11.9", "I10"],
+        "procedure_codes": ["99213", "96372"],
+        "total_charges": 275.00,
+        "status": "paid",
+        "payment_amount": 220.00,
+        "payment_date": "2024-02-15",
+        "insurance": {
+            "payer_name": "Blue Cross Blue Shield",
+            "member_id": "MB123456789"
+        }
+    },
+    "CLM002": {
+        "claim_id": "CLM002",
+        "patient_id": "P001",
+        "service_date": "2024-02-01",
+        "provider_id": "PRV001",
+        "diagnosis_codes": ["Z00.00"],
+        "procedure_codes": ["99214"],
+        "total_charges": 185.00,
+        "status": "pending",
+        "submitted_date": "2024-02-02",
+        "insurance": {
+            "payer_name": "Blue Cross Blue Shield",
+            "member_id": "MB123456789"
+        }
+    }
+})
+
+_INSURANCE_PLANS: Final[Mapping[str, Dict[str, Any]]] = MappingProxyType({
+    "INS001": {
+        "insurance_id": "INS001",
+        "member_id": "MB123456789",
+        "payer_name": "Blue Cross Blue Shield",
+        "payer_id": "60054",
+        "plan_name": "PPO Gold",
+        "group_number": "GRP001",
+        "effective_date": "2024-01-01",
+        "termination_date": "2024-12-31",
+        "coverage_type": "medical",
+        "benefits": {
+            "deductible": {
+                "individual": 1000.00,
+                "family": 2000.00
+            },
+            "out_of_pocket_max": {
+                "individual": 5000.00,
+                "family": 10000.00
+            },
+            "office_visit_copay": 25.00,
+            "specialist_copay": 50.00,
+            "coinsurance": 20
+        },
+        "status": "active"
+    },
+    "INS002": {
+        "insurance_id": "INS002",
+        "member_id": "MB987654321",
+        "payer_name": "Aetna",
+        "payer_id": "60054",
+        "plan_name": "HMO Select",
+        "group_number": "GRP002",
+        "effective_date": "2024-01-01",
+        "termination_date": "2024-12-31",
+        "coverage_type": "medical",
+        "benefits": {
+            "deductible": {
+                "individual": 500.00,
+                "family": 1500.00
+            },
+            "out_of_pocket_max": {
+                "individual": 3000.00,
+                "family": 6000.00
+            },
+            "office_visit_copay": 20.00,
+            "specialist_copay": 40.00,
+            "coinsurance": 10
+        },
+        "status": "active"
+    }
+})
+
+
+def _preserialize(records: Mapping[str, Dict[str, Any]]) -> Dict[str, orjson.Fragment]:
+    """Serialize each record once, indented (if at all) to sit one level down in a lookup response"""
+    return {
+        key: orjson.Fragment(orjson.dumps(record, option=DUMP_OPTS).replace(b"\n", b"\n  "))
+        for key, record in records.items()
+    }
+
+
+_PATIENT_JSON = _preserialize(_PATIENTS)
+_CLAIM_JSON = _preserialize(_CLAIMS)
+_INSURANCE_JSON = _preserialize(_INSURANCE_PLANS)
+
+
+def _not_found_template(message: str) -> str:
+    """Serialized miss response with a %s placeholder for lookup_date"""
+    return orjson.dumps(
+        {"found": False, "message": message, "lookup_date": "%s"}, option=DUMP_OPTS
+    ).decode()
+
+
+_PATIENT_NOT_FOUND = _not_found_template("Patient not found")
+_CLAIM_NOT_FOUND = _not_found_template("No claims found")
+_INSURANCE_NOT_FOUND = _not_found_template("Insurance information not found")
+
+# (epoch second, ISO timestamp) for lookup_date; replaced as one tuple so
+# concurrent callers never see a mismatched pair
+_now_iso_cache = (0, "")
+
+
+def _now_iso() -> str:
+    """Current time as ISO 8601, recomputed at most once per second"""
+    global _now_iso_cache
+    second = int(time.time())
+    cached_second, cached = _now_iso_cache
+    if second != cached_second:
+        cached = datetime.now().isoformat()
+        _now_iso_cache = (second, cached)
+    return cached
+
+
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def _cached_match(tool_cls: type, search_criteria: str,
+                  ttl_bucket: int) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Memoize parsed criteria and match per tool; the TTL bucket in the key bounds staleness"""
+    return tool_cls._match(search_criteria)
+
+
+def _ttl_bucket() -> int:
+    """Current cache generation; entries from earlier generations are never hit again"""
+    return int(time.monotonic() // LOOKUP_CACHE_TTL_SECONDS)
+
+
+# Secondary-key indexes (names casefolded); the first record wins when a key
+# repeats, as the scans did
+_PATIENT_BY_NAME: Dict[Tuple[str, str], str] = {}
+for _patient in _PATIENTS.values():
+    _PATIENT_BY_NAME.setdefault(
+        (_patient["first_name"].casefold(), _patient["last_name"].casefold()), _patient["patient_id"]
     )
+
+_CLAIMS_BY_PATIENT: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+for _claim in _CLAIMS.values():
+    _CLAIMS_BY_PATIENT[_claim["patient_id"]].append(_claim)
+
+_INSURANCE_BY_MEMBER: Dict[str, str] = {}
+for _insurance in _INSURANCE_PLANS.values():
+    _INSURANCE_BY_MEMBER.setdefault(_insurance["member_id"], _insurance["insurance_id"])
+
+
+def _mock_patient_lookup(criteria: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Mock patient lookup for demonstration; None when nothing matches"""
     
-    def _run(self, search_criteria: str) -> str:
-        """Look up patient information"""
-        try:
-            # Parse search criteria
-            if isinstance(search_criteria, str):
-                try:
-                    criteria = json.loads(search_criteria)
-                except:
-                    # If not JSON, treat as patient ID
-                    criteria = {"patient_id": search_criteria}
-            else:
-                criteria = search_criteria
-            
-            # Mock patient lookup - in production would query actual database
-            patient_data = self._mock_patient_lookup(criteria)
-            
-            logger.info(f"Patient lookup completed for criteria: {criteria}")
-            return json.dumps(patient_data, indent=2)
-            
-        except Exception as e:
-            error_msg = f"Patient lookup failed: {str(e)}"
-            logger.error(error_msg)
-            return json.dumps({"error": error_msg})
+    patient_id = criteria.get("patient_id")
     
-    def _mock_patient_lookup(self, criteria: Dict[str, Any]) -> Dict[str, Any]:
-        """Mock patient lookup for demonstration"""
-        
-        patient_id = criteria.get("patient_id")
-        
-        # Mock patient database
-        patients = {
-            "P001": {
-                "patient_id": "P001",
-                "first_name": "John",
-                "last_name": "Smith",
-                "date_of_birth": "1980-05-15",
-                "gender": "M",
-                "ssn": "***-**-1234",
-                "phone": "(555) 123-4567",
-                "email": "john.smith@email.com",
-                "address": {
-                    "street": "123 Main St",
-                    "city": "Anytown",
-                    "state": "CA",
-                    "zip_code": "90210"
-                },
-                "insurance": {
-                    "primary": {
-                        "insurance_id": "INS001",
-                        "member_id": "MB123456789",
-                        "payer_name": "Blue Cross Blue Shield",
-                        "group_number": "GRP001",
-                        "effective_date": "2024-01-01",
-                        "termination_date": "2024-12-31"
-                    }
-                },
-                "emergency_contact": {
-                    "name": "Jane Smith",
-                    "relationship": "Spouse",
-                    "phone": "(555) 123-4568"
-                }
-            },
-            "P002": {
-                "patient_id": "P002", 
-                "first_name": "Mary",
-                "last_name": "Johnson",
-                "date_of_birth": "1975-09-22",
-                "gender": "F",
-                "ssn": "***-**-5678",
-                "phone": "(555) 987-6543",
-                "email": "mary.johnson@email.com",
-                "address": {
-                    "street": "456 Oak Ave",
-                    "city": "Springfield",
-                    "state": "NY",
-                    "zip_code": "12345"
-                },
-                "insurance": {
-                    "primary": {
-                        "insurance_id": "INS002",
-                        "member_id": "MB987654321",
-                        "payer_name": "Aetna",
-                        "group_number": "GRP002",
-                        "effective_date": "2024-01-01",
-                        "termination_date": "2024-12-31"
-                    }
-                }
+    record = _PATIENT_JSON.get(patient_id) if patient_id else None
+    if record is not None:
+        return {
+            "found": True,
+            "patient": record
+        }
+    
+    # Search by name if patient_id not found
+    first_name = criteria.get("first_name")
+    last_name = criteria.get("last_name")
+    
+    if first_name and last_name:
+        match_id = _PATIENT_BY_NAME.get((first_name.casefold(), last_name.casefold()))
+        if match_id is not None:
+            return {
+                "found": True,
+                "patient": _PATIENT_JSON[match_id]
             }
+    
+    return None
+
+
+def _mock_claim_lookup(criteria: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Mock claim lookup for demonstration; None when nothing matches"""
+    
+    claim_id = criteria.get("claim_id")
+    patient_id = criteria.get("patient_id")
+    
+    record = _CLAIM_JSON.get(claim_id) if claim_id else None
+    if record is not None:
+        return {
+            "found": True,
+            "claim": record
         }
+    
+    # Search by patient ID
+    if patient_id:
+        patient_claims = _CLAIMS_BY_PATIENT.get(patient_id)
         
-        if patient_id and patient_id in patients:
+        if patient_claims:
             return {
                 "found": True,
-                "patient": patients[patient_id],
-                "lookup_date": datetime.now().isoformat()
+                "claims": patient_claims,
+                "count": len(patient_claims)
             }
-        
-        # Search by name if patient_id not found
-        first_name = criteria.get("first_name", "").lower()
-        last_name = criteria.get("last_name", "").lower()
-        
-        if first_name and last_name:
-            for patient in patients.values():
-                if (patient["first_name"].lower() == first_name and 
-                    patient["last_name"].lower() == last_name):
-                    return {
-                        "found": True,
-                        "patient": patient,
-                        "lookup_date": datetime.now().isoformat()
-                    }
-        
+    
+    return None
+
+
+def _mock_insurance_lookup(criteria: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Mock insurance lookup for demonstration; None when nothing matches"""
+    
+    member_id = criteria.get("member_id")
+    insurance_id = criteria.get("insurance_id")
+    
+    record = _INSURANCE_JSON.get(insurance_id) if insurance_id else None
+    if record is not None:
         return {
-            "found": False,
-            "message": "Patient not found",
-            "lookup_date": datetime.now().isoformat()
+            "found": True,
+            "insurance": record
         }
+    
+    # Search by member ID
+    if member_id:
+        match_id = _INSURANCE_BY_MEMBER.get(member_id)
+        if match_id is not None:
+            return {
+                "found": True,
+                "insurance": _INSURANCE_JSON[match_id]
+            }
+    
+    return None
 
 
-class ClaimLookupTool(BaseTool):
-    """Tool for looking up claim information"""
+class _LookupToolBase(BaseTool):
+    """Shared input parsing, caching and serialization for the database lookup tools"""
     
-    name: str = "Claim Database Lookup"
-    description: str = (
-        "Look up claim information from the database. "
-        "Input should be claim ID, patient ID, or date range. "
-        "Returns claim details, status, and payment information."
-    )
+    # Set by each tool: key for bare-ID input, log/error label, miss template, record lookup
+    _default_key: ClassVar[str]
+    _label: ClassVar[str]
+    _not_found: ClassVar[str]
+    _mock_lookup: ClassVar[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]]
     
     def _run(self, search_criteria: str) -> str:
-        """Look up claim information"""
+        """Look up records matching the search criteria"""
+        return self._lookup(search_criteria)
+    
+    @classmethod
+    def _match(cls, search_criteria: Any) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Parse the criteria and find the matching records (None when nothing matches)"""
+        if isinstance(search_criteria, str):
+            # Only JSON objects/arrays are parsed; anything else is a bare ID
+            if search_criteria.lstrip()[:1] in ("{", "["):
+                criteria = orjson.loads(search_criteria)
+            else:
+                criteria = {cls._default_key: search_criteria}
+        else:
+            criteria = search_criteria
+        
+        # Mock lookup - in production would query actual database
+        return criteria, cls._mock_lookup(criteria)
+    
+    @classmethod
+    def _lookup(cls, search_criteria: Any) -> str:
+        """Run the lookup and serialize the response; every call is logged and stamped"""
         try:
-            # Parse search criteria
             if isinstance(search_criteria, str):
-                try:
-                    criteria = json.loads(search_criteria)
-                except:
-                    # If not JSON, treat as claim ID
-                    criteria = {"claim_id": search_criteria}
+                criteria, data = _cached_match(cls, search_criteria, _ttl_bucket())
             else:
-                criteria = search_criteria
+                criteria, data = cls._match(search_criteria)
             
-            # Mock claim lookup
-            claim_data = self._mock_claim_lookup(criteria)
-            
-            logger.info(f"Claim lookup completed for criteria: {criteria}")
-            return json.dumps(claim_data, indent=2)
+            # Only the field names are logged; the criteria values are PHI
+            fields = list(criteria) if isinstance(criteria, dict) else type(criteria).__name__
+            logger.info("%s lookup completed for criteria fields: %s", cls._label, fields)
+            if data is None:
+                return cls._not_found % _now_iso()
+            return orjson.dumps({**data, "lookup_date": _now_iso()}, option=DUMP_OPTS).decode()
             
         except Exception as e:
-            error_msg = f"Claim lookup failed: {str(e)}"
+            error_msg = f"{cls._label} lookup failed: {str(e)}"
             logger.error(error_msg)
-            return json.dumps({"error": error_msg})
+            return orjson.dumps({"error": error_msg}).decode()
+
+
+class PatientLookupTool(_LookupToolBase):
+    """Tool for looking up patient information"""
     
-    def _mock_claim_lookup(self, criteria: Dict[str, Any]) -> Dict[str, Any]:
-        """Mock claim lookup for demonstration"""
-        
-        claim_id = criteria.get("claim_id")
-        patient_id = criteria.get("patient_id")
-        
-        # Mock claims database
-        claims = {
-            "CLM001": {
-                "claim_id": "CLM001",
-                "patient_id": "P001",
-                "service_date": "2024-01-15",
-                "provider_id": "PRV001",
-                "diagnosis_codes": ["E11.9", "I10"],
-                "procedure_codes": ["99213", "96372"],
-                "total_charges": 275.00,
-                "status": "paid",
-                "payment_amount": 220.00,
-                "payment_date": "2024-02-15",
-                "insurance": {
-                    "payer_name": "Blue Cross Blue Shield",
-                    "member_id": "MB123456789"
-                }
-            },
-            "CLM002": {
-                "claim_id": "CLM002",
-                "patient_id": "P001",
-                "service_date": "2024-02-01",
-                "provider_id": "PRV001",
-                "diagnosis_codes": ["Z00.00"],
-                "procedure_codes": ["99214"],
-                "total_charges": 185.00,
-                "status": "pending",
-                "submitted_date": "2024-02-02",
-                "insurance": {
-                    "payer_name": "Blue Cross Blue Shield",
-                    "member_id": "MB123456789"
-                }
-            }
-        }
-        
-        if claim_id and claim_id in claims:
-            return {
-                "found": True,
-                "claim": claims[claim_id],
-                "lookup_date": datetime.now().isoformat()
-            }
-        
-        # Search by patient ID
-        if patient_id:
-            patient_claims = [claim for claim in claims.values() 
-                            if claim["patient_id"] == patient_id]
-            
-            if patient_claims:
-                return {
-                    "found": True,
-                    "claims": patient_claims,
-                    "count": len(patient_claims),
-                    "lookup_date": datetime.now().isoformat()
-                }
-        
-        return {
-            "found": False,
-            "message": "No claims found",
-            "lookup_date": datetime.now().isoformat()
-        }
+    name: str = "Patient Database Lookup"
+    description: str = (
+        "Look up patient information from the database. "
+        "Input should be patient ID, name, or other identifying information. "
+        "Returns patient demographics and insurance information."
+    )
+    
+    _default_key: ClassVar[str] = "patient_id"
+    _label: ClassVar[str] = "Patient"
+    _not_found: ClassVar[str] = _PATIENT_NOT_FOUND
+    _mock_lookup = staticmethod(_mock_patient_lookup)
+
 
+class ClaimLookupTool(_LookupToolBase):
+    """Tool for looking up claim information"""
+    
+    name: str = "Claim Database Lookup"
+    description: str = (
+        "Look up claim information from the database. "
+        "Input should be claim ID, patient ID, or date range. "
+        "Returns claim details, status, and payment information."
+    )
+    
+    _default_key: ClassVar[str] = "claim_id"
+    _label: ClassVar[str] = "Claim"
+    _not_found: ClassVar[str] = _CLAIM_NOT_FOUND
+    _mock_lookup = staticmethod(_mock_claim_lookup)
 
-class InsuranceLookupTool(BaseTool):
+
+class InsuranceLookupTool(_LookupToolBase):
     """Tool for looking up insurance information"""
     
     name: str = "Insurance Database Lookup"
@@ -258,109 +412,7 @@ class InsuranceLookupTool(BaseTool):
         "Returns insurance details, coverage, and benefit information."
     )
     
-    def _run(self, search_criteria: str) -> str:
-        """Look up insurance information"""
-        try:
-            # Parse search criteria
-            if isinstance(search_criteria, str):
-                try:
-                    criteria = json.loads(search_criteria)
-                except:
-                    # If not JSON, treat as member ID
-                    criteria = {"member_id": search_criteria}
-            else:
-                criteria = search_criteria
-            
-            # Mock insurance lookup
-            insurance_data = self._mock_insurance_lookup(criteria)
-            
-            logger.info(f"Insurance lookup completed for criteria: {criteria}")
-            return json.dumps(insurance_data, indent=2)
-            
-        except Exception as e:
-            error_msg = f"Insurance lookup failed: {str(e)}"
-            logger.error(error_msg)
-            return json.dumps({"error": error_msg})
-    
-    def _mock_insurance_lookup(self, criteria: Dict[str, Any]) -> Dict[str, Any]:
-        """Mock insurance lookup for demonstration"""
-        
-        member_id = criteria.get("member_id")
-        insurance_id = criteria.get("insurance_id")
-        
-        # Mock insurance database
-        insurance_plans = {
-            "INS001": {
-                "insurance_id": "INS001",
-                "member_id": "MB123456789",
-                "payer_name": "Blue Cross Blue Shield",
-                "payer_id": "60054",
-                "plan_name": "PPO Gold",
-                "group_number": "GRP001",
-                "effective_date": "2024-01-01",
-                "termination_date": "2024-12-31",
-                "coverage_type": "medical",
-                "benefits": {
-                    "deductible": {
-                        "individual": 1000.00,
-                        "family": 2000.00
-                    },
-                    "out_of_pocket_max": {
-                        "individual": 5000.00,
-                        "family": 10000.00
-                    },
-                    "office_visit_copay": 25.00,
-                    "specialist_copay": 50.00,
-                    "coinsurance": 20
-                },
-                "status": "active"
-            },
-            "INS002": {
-                "insurance_id": "INS002",
-                "member_id": "MB987654321",
-                "payer_name": "Aetna",
-                "payer_id": "60054",
-                "plan_name": "HMO Select",
-                "group_number": "GRP002",
-                "effective_date": "2024-01-01",
-                "termination_date": "2024-12-31",
-                "coverage_type": "medical",
-                "benefits": {
-                    "deductible": {
-                        "individual": 500.00,
-                        "family": 1500.00
-                    },
-                    "out_of_pocket_max": {
-                        "individual": 3000.00,
-                        "family": 6000.00
-                    },
-                    "office_visit_copay": 20.00,
-                    "specialist_copay": 40.00,
-                    "coinsurance": 10
-                },
-                "status": "active"
-            }
-        }
-        
-        if insurance_id and insurance_id in insurance_plans:
-            return {
-                "found": True,
-                "insurance": insurance_plans[insurance_id],
-                "lookup_date": datetime.now().isoformat()
-            }
-        
-        # Search by member ID
-        if member_id:
-            for insurance in insurance_plans.values():
-                if insurance["member_id"] == member_id:
-                    return {
-                        "found": True,
-                        "insurance": insurance,
-                        "lookup_date": datetime.now().isoformat()
-                    }
-        
-        return {
-            "found": False,
-            "message": "Insurance information not found",
-            "lookup_date": datetime.now().isoformat()
-        } 
\ No newline at end of file
+    _default_key: ClassVar[str] = "member_id"
+    _label: ClassVar[str] = "Insurance"
+    _not_found: ClassVar[str] = _INSURANCE_NOT_FOUND
+    _mock_lookup = staticmethod(_mock_insurance_lookup)
@@ -2,36 +2,454 @@
 Eligibility and Insurance Verification Tools for CrewAI agents
 """
 
-import json
-from typing import Dict, Any, Optional
+import orjson
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
 from datetime import datetime, date
 from crewai_tools import BaseTool
 import asyncio
-import aiohttp
 
 from app.utils.logging import get_logger
 from app.config import settings
+from app.utils.http import get_session
+from app.utils import loop as background_loop
+from ._json import DUMP_OPTS
 
 
 logger = get_logger("tools.eligibility")
 
 
+# Eligibility requests arriving within this window are sent as one batch
+BATCH_WINDOW_SECONDS = 0.010
+MAX_BATCH_SIZE = 20
+
+# Transient clearinghouse failures (network errors, timeouts, 5xx) are retried
+# with jittered exponential backoff; after repeated failed calls the breaker
+# fails fast for a while instead of hammering the payer
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 2.0
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30
+
+
+class ClearinghouseError(Exception):
+    """Non-200 response from the clearinghouse API"""
+    def __init__(self, status: int, text: str):
+        super().__init__(f"API error {status}: {text}")
+        self.status = status
+        self.text = text
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the clearinghouse while its circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops calls to an endpoint for a while after repeated consecutive failures
+    
+    After ``failure_threshold`` failures in a row the breaker opens and calls fail
+    fast with CircuitOpenError for ``reset_seconds``. A single call is then let
+    through as a probe while the rest keep failing fast: success closes the
+    breaker, failure reopens it. A probe that never reports back (e.g. it was
+    cancelled) is replaced by another after ``reset_seconds``.
+    """
+    
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+    
+    def check(self) -> None:
+        """Raise CircuitOpenError if calls are currently being short-circuited"""
+        if self.opened_at is None:
+            return
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_seconds:
+            raise CircuitOpenError("Clearinghouse temporarily unavailable")
+        # Half-open: admit this call as the probe and restart the window, so
+        # concurrent callers are still short-circuited until it reports back
+        self.opened_at = now
+        self.probing = True
+    
+    def record_success(self) -> None:
+        """Reset the failure count after a call that reached the endpoint"""
+        if self.opened_at is not None:
+            logger.info("Clearinghouse circuit closed")
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+    
+    def record_failure(self) -> None:
+        """Count a failed call, opening the breaker at the threshold or on a failed probe"""
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(f"Clearinghouse circuit opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+            self.probing = False
+
+
+_breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+
+
+async def _post_clearinghouse(path: str, payload: Any) -> Any:
+    """POST to the clearinghouse, retrying transient failures with jittered exponential backoff"""
+    import aiohttp  # Deferred with the session; only the real clearinghouse path needs it
+    
+    _breaker.check()
+    
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            result = await _post_once(path, payload)
+        except ClearinghouseError as e:
+            if e.status < 500:
+                # The endpoint is up; this request was rejected and retrying won't help
+                _breaker.record_success()
+                raise
+            error: Exception = e
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = e
+        else:
+            _breaker.record_success()
+            return result
+        
+        if attempt < RETRY_ATTEMPTS:
+            await asyncio.sleep(random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1))))
+    
+    _breaker.record_failure()
+    raise error
+
+
+async def _post_once(path: str, payload: Any) -> Any:
+    """POST JSON to the clearinghouse over the pooled session and return the decoded body"""
+    headers = {
+        "Authorization": f"Bearer {settings.CLEARINGHOUSE_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    
+    # Pooled keep-alive session; timeouts are set on the session
+    session = get_session()
+    async with session.post(
+        f"{settings.CLEARINGHOUSE_API_URL}{path}",
+        json=payload,
+        headers=headers
+    ) as response:
+        
+        # Read the body once and decode it ourselves; response.json() decodes to str first
+        body = await response.read()
+        if response.status == 200:
+            return orjson.loads(body)
+        raise ClearinghouseError(response.status, body.decode("utf-8", "replace"))
+
+
+class EligibilityBatcher:
+    """Coalesces eligibility requests made close together into one batch POST
+    
+    The first queued request waits up to ``window`` seconds for others to join it,
+    and a batch is sent as soon as it reaches ``max_batch_size``. A request with
+    nothing queued behind it is sent on its own straight away, so a quiet system
+    pays no batching delay.
+    """
+    
+    def __init__(self, window: float = BATCH_WINDOW_SECONDS, max_batch_size: int = MAX_BATCH_SIZE):
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.loop = asyncio.get_running_loop()
+        self._queue: "asyncio.Queue[Tuple[Dict[str, Any], asyncio.Future]]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def submit(self, request_data: Dict[str, Any]) -> Any:
+        """Queue one eligibility request and wait for its response"""
+        if self._worker is None or self._worker.done():
+            self._worker = self.loop.create_task(self._collect())
+        
+        future = self.loop.create_future()
+        self._queue.put_nowait((request_data, future))
+        return await future
+    
+    async def _collect(self) -> None:
+        """Drain the queue into batches and dispatch each one without blocking collection"""
+        while True:
+            batch = [await self._queue.get()]
+            
+            # Let submissions scheduled alongside this one reach the queue
+            await asyncio.sleep(0)
+            if not self._queue.empty():
+                deadline = self.loop.time() + self.window
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - self.loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            
+            self.loop.create_task(self._dispatch(batch))
+    
+    async def _dispatch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        """Send one batch and resolve each caller's future with its response"""
+        if len(batch) > 1:
+            try:
+                body = await _post_clearinghouse(
+                    "/eligibility/batch", {"requests": [request for request, _ in batch]}
+                )
+                results = body["responses"]
+                if len(results) != len(batch):
+                    raise ValueError(f"Batch returned {len(results)} responses for {len(batch)} requests")
+            except ClearinghouseError as e:
+                if e.status >= 500:
+                    self._resolve(batch, [e] * len(batch))
+                    return
+                # One bad request, or a clearinghouse without the batch route, must not
+                # fail the rest of the batch; send each request on its own instead
+                logger.warning(f"Batch eligibility request rejected ({e.status}), sending {len(batch)} requests individually")
+            except Exception as e:
+                self._resolve(batch, [e] * len(batch))
+                return
+            else:
+                self._resolve(batch, results)
+                return
+        
+        results = await asyncio.gather(
+            *(_post_clearinghouse("/eligibility", request) for request, _ in batch),
+            return_exceptions=True
+        )
+        self._resolve(batch, results)
+    
+    @staticmethod
+    def _resolve(batch: List[Tuple[Dict[str, Any], asyncio.Future]], results: List[Any]) -> None:
+        """Complete each caller's future with its response, or with the exception raised for it"""
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+# Batcher for the loop currently making eligibility calls; replaced if a call
+# arrives on a different loop, since its queue and tasks belong to their loop
+_batcher: Optional[EligibilityBatcher] = None
+
+
+def _get_batcher() -> EligibilityBatcher:
+    """Return the eligibility batcher for the running loop"""
+    global _batcher
+    if _batcher is None or _batcher.loop is not asyncio.get_running_loop():
+        _batcher = EligibilityBatcher()
+    return _batcher
+
+
+# Clearinghouse answers reused for repeat checks of the same member, payer and date
+ELIGIBILITY_CACHE_SIZE = 10000
+ELIGIBILITY_CACHE_TTL_SECONDS = 900
+
+# Only definitive answers are cached; failures and timeouts are retried
+_CACHEABLE_STATUSES = frozenset({"active", "inactive"})
+
+# (member_id, payer_id, service_date) -> (expiry on the monotonic clock, response),
+# least recently used first. Tools may run on several threads, so access is locked.
+_eligibility_cache: "OrderedDict[Tuple[str, str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_eligibility_cache_lock = threading.Lock()
+
+# Checks in flight per key, so concurrent misses for one member share a single call
+_inflight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+
+
+def _cache_get(key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+    """Return an unexpired cached response, refreshing its LRU position"""
+    with _eligibility_cache_lock:
+        entry = _eligibility_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _eligibility_cache[key]
+            return None
+        _eligibility_cache.move_to_end(key)
+        return entry[1]
+
+
+def _cache_put(key: Tuple[str, str, str], response: Dict[str, Any]) -> None:
+    """Store a response, evicting the least recently used entries past the size limit"""
+    with _eligibility_cache_lock:
+        _eligibility_cache[key] = (time.monotonic() + ELIGIBILITY_CACHE_TTL_SECONDS, response)
+        _eligibility_cache.move_to_end(key)
+        while len(_eligibility_cache) > ELIGIBILITY_CACHE_SIZE:
+            _eligibility_cache.popitem(last=False)
+
+
+async def _cached_check(key: Tuple[str, str, str],
+                        check: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                        request_data: Dict[str, Any], force_refresh: bool = False) -> Dict[str, Any]:
+    """Run ``check`` unless a fresh answer for ``key`` is cached or already being fetched"""
+    loop = asyncio.get_running_loop()
+    while not force_refresh:
+        cached = _cache_get(key)
+        if cached is not None:
+            return dict(cached)
+        
+        pending = _inflight.get(key)
+        if pending is None or pending.get_loop() is not loop:
+            break
+        
+        # asyncio.wait neither cancels the shared check when this caller is
+        # cancelled nor raises when the caller that owns it was
+        await asyncio.wait((pending,))
+        if not pending.cancelled():
+            return dict(pending.result())
+        # The owner was cancelled; look again, and run the check here if nobody else has
+    
+    future = loop.create_future()
+    _inflight[key] = future
+    try:
+        result = await check(request_data)
+        if result.get("eligibility_status") in _CACHEABLE_STATUSES:
+            _cache_put(key, result)
+        future.set_result(result)
+        return dict(result)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Nobody may be waiting on this future; don't log "exception never retrieved"
+        future.exception()
+        raise
+    finally:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+
+
+# Mock service descriptions - in production would query CPT database
+_CPT_DESCRIPTIONS: Dict[str, str] = {
+    "99213": "Office visit, established patient, level 3",
+    "99214": "Office visit, established patient, level 4",
+    "99203": "Office visit, new patient, level 3",
+    "70553": "MRI brain without and with contrast",
+    "73721": "MRI knee without contrast",
+    "27447": "Total knee arthroplasty",
+    "99281": "Emergency department visit, level 1",
+    "99285": "Emergency department visit, level 5"
+}
+
+# Mock benefit details by the first two digits of the service code
+_COVERAGE_BY_PREFIX: Dict[str, Dict[str, Any]] = {
+    "99": {  # Office visits
+        "copay": 25.00,
+        "deductible_applies": False,
+        "coinsurance": 0
+    },
+    "70": {  # Radiology
+        "copay": 0,
+        "deductible_applies": True,
+        "coinsurance": 20,
+        "authorization_required": True
+    },
+    "27": {  # Surgery
+        "copay": 0,
+        "deductible_applies": True,
+        "coinsurance": 20,
+        "authorization_required": True,
+        "precertification_required": True
+    }
+}
+
+_DEFAULT_COVERAGE: Dict[str, Any] = {
+    "copay": 0,
+    "deductible_applies": True,
+    "coinsurance": 20
+}
+
+
+# Mock eligibility responses for demonstration, without their checked_date
+_MOCK_ACTIVE: Dict[str, Any] = {
+    "eligibility_status": "active",
+    "is_eligible": True,
+    "effective_date": "2024-01-01",
+    "termination_date": "2024-12-31",
+    "coverage_level": "family",
+    "plan_type": "PPO",
+    "deductible": {
+        "individual": 1000.00,
+        "family": 2000.00,
+        "remaining": 750.00
+    },
+    "out_of_pocket_max": {
+        "individual": 5000.00,
+        "family": 10000.00,
+        "remaining": 4200.00
+    },
+    "copays": {
+        "office_visit": 25.00,
+        "specialist": 50.00,
+        "emergency_room": 200.00,
+        "urgent_care": 75.00
+    },
+    "coinsurance": 20,  # 20% after deductible
+    "benefits": [
+        {
+            "service_type": "medical_care",
+            "coverage_level": "covered",
+            "network_status": "in_network"
+        },
+        {
+            "service_type": "preventive_care",
+            "coverage_level": "covered",
+            "network_status": "in_network",
+            "deductible_applies": False
+        }
+    ]
+}
+
+_MOCK_INACTIVE: Dict[str, Any] = {
+    "eligibility_status": "inactive",
+    "is_eligible": False,
+    "termination_date": "2023-12-31",
+    "termination_reason": "Coverage terminated"
+}
+
+_MOCK_PENDING: Dict[str, Any] = {
+    "eligibility_status": "pending",
+    "is_eligible": False,
+    "pending_reason": "Coverage under review",
+    "estimated_resolution": "3-5 business days"
+}
+
+_MOCK_RESPONSES: Dict[str, Dict[str, Any]] = {
+    **dict.fromkeys("12345", _MOCK_ACTIVE),
+    **dict.fromkeys("67", _MOCK_INACTIVE)
+}
+
+
 class EligibilityCheckTool(BaseTool):
     """Tool for checking patient eligibility with insurance payers"""
     
     name: str = "Insurance Eligibility Checker"
     description: str = (
         "Verify patient insurance eligibility and coverage. "
-        "Input should be JSON with patient_info and insurance_info. "
-        "Returns eligibility status, coverage details, and benefit information."
+        "Input should be JSON with patient_info and insurance_info; set force_refresh to bypass "
+        "recently cached results. Returns eligibility status, coverage details, and benefit information."
     )
     
     def _run(self, input_data: str) -> str:
+        """Check patient eligibility with insurance payer"""
+        # Runs on the shared background loop so the HTTP pool, cache and batcher persist
+        return background_loop.run(self._arun(input_data))
+    
+    async def _arun(self, input_data: str) -> str:
         """Check patient eligibility with insurance payer"""
         try:
             # Parse input data
             if isinstance(input_data, str):
-                data = json.loads(input_data)
+                data = orjson.loads(input_data)
             else:
                 data = input_data
             
@@ -41,30 +459,30 @@ class EligibilityCheckTool(BaseTool):
             
             # Validate required fields
             if not patient_info or not insurance_info:
-                return json.dumps({
+                return orjson.dumps({
                     "error": "Both patient_info and insurance_info are required",
                     "eligibility_status": "failed"
-                })
+                }).decode()
             
             # Perform eligibility check
-            eligibility_result = asyncio.run(
-                self._check_eligibility_async(patient_info, insurance_info, service_date)
+            eligibility_result = await self._check_eligibility_async(
+                patient_info, insurance_info, service_date, force_refresh=bool(data.get("force_refresh"))
             )
             
             logger.info(f"Eligibility check completed for patient {patient_info.get('member_id', 'unknown')}")
-            return json.dumps(eligibility_result, indent=2)
+            return orjson.dumps(eligibility_result, option=DUMP_OPTS).decode()
             
         except Exception as e:
             error_msg = f"Eligibility check failed: {str(e)}"
             logger.error(error_msg)
-            return json.dumps({
+            return orjson.dumps({
                 "error": error_msg,
                 "eligibility_status": "failed"
-            })
+            }).decode()
     
     async def _check_eligibility_async(self, patient_info: Dict[str, Any], 
                                      insurance_info: Dict[str, Any], 
-                                     service_date: str) -> Dict[str, Any]:
+                                     service_date: str, force_refresh: bool = False) -> Dict[str, Any]:
         """Perform async eligibility check"""
         
         # Build eligibility request
@@ -90,38 +508,33 @@ class EligibilityCheckTool(BaseTool):
         # For demo purposes, simulate eligibility check
         # In production, this would make API calls to clearinghouse or payer
         if settings.CLEARINGHOUSE_API_URL:
-            return await self._real_eligibility_check(request_data)
+            key = (request_data["patient"]["member_id"], request_data["insurance"]["payer_id"], service_date)
+            return await _cached_check(key, self._real_eligibility_check, request_data, force_refresh)
         else:
             return self._mock_eligibility_check(request_data)
     
     async def _real_eligibility_check(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """Make real API call to clearinghouse for eligibility"""
         
-        headers = {
-            "Authorization": f"Bearer {settings.CLEARINGHOUSE_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{settings.CLEARINGHOUSE_API_URL}/eligibility",
-                    json=request_data,
-                    headers=headers,
-                    timeout=30
-                ) as response:
-                    
-                    if response.status == 200:
-                        result = await response.json()
-                        return self._parse_eligibility_response(result)
-                    else:
-                        error_text = await response.text()
-                        return {
-                            "eligibility_status": "failed",
-                            "error": f"API error {response.status}: {error_text}",
-                            "is_eligible": False
-                        }
-                        
+            if settings.CLEARINGHOUSE_BATCH_ELIGIBILITY:
+                result = await _get_batcher().submit(request_data)
+            else:
+                result = await _post_clearinghouse("/eligibility", request_data)
+            return self._parse_eligibility_response(result)
+            
+        except CircuitOpenError as e:
+            return {
+                "eligibility_status": "unavailable",
+                "error": str(e),
+                "is_eligible": False
+            }
+        except ClearinghouseError as e:
+            return {
+                "eligibility_status": "failed",
+                "error": f"API error {e.status}: {e.text}",
+                "is_eligible": False
+            }
         except asyncio.TimeoutError:
             return {
                 "eligibility_status": "timeout",
@@ -148,67 +561,9 @@ class EligibilityCheckTool(BaseTool):
                 "is_eligible": False
             }
         
-        # Mock positive eligibility
-        if member_id.endswith(("1", "2", "3", "4", "5")):
-            return {
-                "eligibility_status": "active",
-                "is_eligible": True,
-                "effective_date": "2024-01-01",
-                "termination_date": "2024-12-31",
-                "coverage_level": "family",
-                "plan_type": "PPO",
-                "deductible": {
-                    "individual": 1000.00,
-                    "family": 2000.00,
-                    "remaining": 750.00
-                },
-                "out_of_pocket_max": {
-                    "individual": 5000.00,
-                    "family": 10000.00,
-                    "remaining": 4200.00
-                },
-                "copays": {
-                    "office_visit": 25.00,
-                    "specialist": 50.00,
-                    "emergency_room": 200.00,
-                    "urgent_care": 75.00
-                },
-                "coinsurance": 20,  # 20% after deductible
-                "benefits": [
-                    {
-                        "service_type": "medical_care",
-                        "coverage_level": "covered",
-                        "network_status": "in_network"
-                    },
-                    {
-                        "service_type": "preventive_care",
-                        "coverage_level": "covered",
-                        "network_status": "in_network",
-                        "deductible_applies": False
-                    }
-                ],
-                "checked_date": datetime.now().isoformat()
-            }
-        
-        # Mock inactive eligibility
-        elif member_id.endswith(("6", "7")):
-            return {
-                "eligibility_status": "inactive",
-                "is_eligible": False,
-                "termination_date": "2023-12-31",
-                "termination_reason": "Coverage terminated",
-                "checked_date": datetime.now().isoformat()
-            }
-        
-        # Mock pending eligibility
-        else:
-            return {
-                "eligibility_status": "pending",
-                "is_eligible": False,
-                "pending_reason": "Coverage under review",
-                "estimated_resolution": "3-5 business days",
-                "checked_date": datetime.now().isoformat()
-            }
+        # Static mock bodies chosen by the member ID's last digit; only the timestamp varies
+        response = _MOCK_RESPONSES.get(member_id[-1], _MOCK_PENDING)
+        return {**response, "checked_date": datetime.now().isoformat()}
     
     def _parse_eligibility_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
         """Parse and normalize eligibility response from API"""
@@ -229,35 +584,42 @@ class CoverageVerificationTool(BaseTool):
     )
     
     def _run(self, input_data: str) -> str:
+        """Verify coverage for specific medical services"""
+        return background_loop.run(self._arun(input_data))
+    
+    async def _arun(self, input_data: str) -> str:
         """Verify coverage for specific medical services"""
         try:
             # Parse input data
             if isinstance(input_data, str):
-                data = json.loads(input_data)
+                data = orjson.loads(input_data)
             else:
                 data = input_data
             
             patient_info = data.get("patient_info", {})
             insurance_info = data.get("insurance_info", {})
             service_codes = data.get("service_codes", [])
-            service_date = data.get("service_date", datetime.now().date().isoformat())
+            
+            # One clock read covers the default service date and the verification stamp
+            now = datetime.now()
+            service_date = data.get("service_date", now.date().isoformat())
             
             if not service_codes:
-                return json.dumps({
+                return orjson.dumps({
                     "error": "Service codes are required for coverage verification"
-                })
-            
-            # Verify coverage for each service
-            coverage_results = []
+                }).decode()
             
-            for service_code in service_codes:
-                coverage = self._verify_service_coverage(
-                    patient_info, insurance_info, service_code, service_date
-                )
-                coverage_results.append(coverage)
+            # Verify each distinct service concurrently; repeated codes share one lookup
+            unique_codes = list(dict.fromkeys(service_codes))
+            verified = await asyncio.gather(*(
+                self._verify_service_coverage(patient_info, insurance_info, service_code, service_date)
+                for service_code in unique_codes
+            ))
+            coverage_by_code = dict(zip(unique_codes, verified))
+            coverage_results = [coverage_by_code[service_code] for service_code in service_codes]
             
             result = {
-                "verification_date": datetime.now().isoformat(),
+                "verification_date": now.isoformat(),
                 "patient_member_id": insurance_info.get("member_id", ""),
                 "service_date": service_date,
                 "coverage_verifications": coverage_results,
@@ -265,17 +627,17 @@ class CoverageVerificationTool(BaseTool):
             }
             
             logger.info(f"Coverage verification completed for {len(service_codes)} services")
-            return json.dumps(result, indent=2)
+            return orjson.dumps(result, option=DUMP_OPTS).decode()
             
         except Exception as e:
             error_msg = f"Coverage verification failed: {str(e)}"
             logger.error(error_msg)
-            return json.dumps({"error": error_msg})
+            return orjson.dumps({"error": error_msg}).decode()
     
-    def _verify_service_coverage(self, patient_info: Dict[str, Any], 
-                                insurance_info: Dict[str, Any], 
-                                service_code: str, 
-                                service_date: str) -> Dict[str, Any]:
+    async def _verify_service_coverage(self, patient_info: Dict[str, Any], 
+                                       insurance_info: Dict[str, Any], 
+                                       service_code: str, 
+                                       service_date: str) -> Dict[str, Any]:
         """Verify coverage for a specific service code"""
         
         # Mock coverage verification based on service code
@@ -291,49 +653,11 @@ class CoverageVerificationTool(BaseTool):
         }
         
         # Add specific coverage details based on service type
-        if service_code.startswith("99"):  # Office visits
-            coverage.update({
-                "copay": 25.00,
-                "deductible_applies": False,
-                "coinsurance": 0
-            })
-        elif service_code.startswith("70"):  # Radiology
-            coverage.update({
-                "copay": 0,
-                "deductible_applies": True,
-                "coinsurance": 20,
-                "authorization_required": True
-            })
-        elif service_code.startswith("27"):  # Surgery
-            coverage.update({
-                "copay": 0,
-                "deductible_applies": True,
-                "coinsurance": 20,
-                "authorization_required": True,
-                "precertification_required": True
-            })
-        else:
-            coverage.update({
-                "copay": 0,
-                "deductible_applies": True,
-                "coinsurance": 20
-            })
+        coverage.update(_COVERAGE_BY_PREFIX.get(service_code[:2], _DEFAULT_COVERAGE))
         
         return coverage
     
     def _get_service_description(self, service_code: str) -> str:
         """Get description for service code"""
         
-        # Mock service descriptions - in production would query CPT database
-        descriptions = {
-            "99213": "Office visit, established patient, level 3",
-            "99214": "Office visit, established patient, level 4",
-            "99203": "Office visit, new patient, level 3",
-            "70553": "MRI brain without and with contrast",
-            "73721": "MRI knee without contrast",
-            "27447": "Total knee arthroplasty",
-            "99281": "Emergency department visit, level 1",
-            "99285": "Emergency department visit, level 5"
-        }
-        
-        return descriptions.get(service_code, f"Service code {service_code}") 
\ No newline at end of file
+        return _CPT_DESCRIPTIONS.get(service_code, f"Service code {service_code}")
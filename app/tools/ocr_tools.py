@@ -2,20 +2,198 @@
 OCR Tools for CrewAI agents to extract data from documents and insurance cards
 """
 
-import json
+import hashlib
+import orjson
+import os
 import re
-from typing import Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
 from crewai_tools import BaseTool
-import pytesseract
-from PIL import Image
-import cv2
-import numpy as np
 
 from app.utils.logging import get_logger
+from app.config import settings
+from ._json import DUMP_OPTS
+from . import _ocr_engine
+
+# OpenCV, Tesseract and NumPy are imported inside the methods that use them, so
+# loading the tool registry doesn't pay for them in workflows that never OCR
+if TYPE_CHECKING:
+    import numpy as np
 
 
 logger = get_logger("tools.ocr")
 
+# Pool for multi-page batches. Tesseract runs as a subprocess and OpenCV releases
+# the GIL, so threads keep every core busy without pickling images between processes
+MAX_OCR_WORKERS = os.cpu_count() or 1
+_ocr_executor = ThreadPoolExecutor(max_workers=MAX_OCR_WORKERS, thread_name_prefix="ocr")
+
+# OCR results by (image BLAKE2b digest, document type), least recently used first,
+# plus the digest last computed for each (path, size, mtime) so unchanged files
+# are not re-read. Shared by the batch pool threads, so access is locked.
+OCR_CACHE_SIZE = 500
+_ocr_cache: "OrderedDict[Tuple[bytes, str], Dict[str, Any]]" = OrderedDict()
+_digest_by_stat: "OrderedDict[Tuple[str, int, int], bytes]" = OrderedDict()
+_ocr_cache_lock = threading.Lock()
+
+# Document types routed to the in-process engine when OCR_BACKEND=rapidocr;
+# everything else, and everything when the engine is not installed, uses Tesseract
+_ENGINE_DOCUMENT_TYPES = frozenset({"insurance_card", "intake_form"})
+_engine_warned = False
+
+# Laplacian variance below which a scan is clean enough to skip the median blur
+NOISE_VARIANCE_THRESHOLD = 50
+
+# Pixel standard deviation above which a page has enough contrast for a global threshold
+GLOBAL_THRESHOLD_MIN_STD = 40
+
+
+def _compile_patterns(patterns: Dict[str, str]) -> Dict[str, "re.Pattern[str]"]:
+    """Compile field patterns once, case-insensitively"""
+    return {field: re.compile(pattern, re.IGNORECASE) for field, pattern in patterns.items()}
+
+
+# Intake form fields
+_PATIENT_PATTERNS = _compile_patterns({
+    "first_name": r"(?:first\s+name|fname)[\s:]*([A-Za-z]+)",
+    "last_name": r"(?:last\s+name|lname|surname)[\s:]*([A-Za-z]+)",
+    "date_of_birth": r"(?:dob|date\s+of\s+birth|birth\s+date)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
+    "phone": r"(?:phone|telephone|tel)[\s:]*(\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})",
+    "email": r"(?:email|e-mail)[\s:]*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})",
+    "address": r"(?:address|street)[\s:]*([0-9]+\s+[A-Za-z\s]+)",
+    "city": r"(?:city)[\s:]*([A-Za-z\s]+)",
+    "state": r"(?:state)[\s:]*([A-Z]{2})",
+    "zip_code": r"(?:zip|postal|zip\s+code)[\s:]*(\d{5}(?:-\d{4})?)"
+})
+
+# Insurance card fields, as read by the generic OCR tool
+_INSURANCE_PATTERNS = _compile_patterns({
+    "member_id": r"(?:member\s+id|id\s+number|member\s+#)[\s:]*([A-Za-z0-9]+)",
+    "group_number": r"(?:group\s+number|group\s+#|grp)[\s:]*([A-Za-z0-9]+)",
+    "plan_name": r"(?:plan|insurance)[\s:]*([A-Za-z\s]+)",
+    "effective_date": r"(?:effective|eff\s+date)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
+    "copay": r"(?:copay|co-pay)[\s:]*\$?(\d+)",
+    "deductible": r"(?:deductible|ded)[\s:]*\$?(\d+)"
+})
+
+# Front of an insurance card
+_CARD_FRONT_PATTERNS = _compile_patterns({
+    "insurance_company": r"([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s*(?:Health|Insurance|Medical)",
+    "member_name": r"(?:member|name)[\s:]*([A-Z][a-z]+\s+[A-Z][a-z]+)",
+    "member_id": r"(?:member\s+id|id|member\s+#)[\s:]*([A-Za-z0-9-]+)",
+    "group_number": r"(?:group|grp)[\s:]*([A-Za-z0-9-]+)",
+    "plan_type": r"(?:plan|type)[\s:]*([A-Za-z\s]+)",
+    "effective_date": r"(?:effective|eff)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
+    "rx_bin": r"(?:bin|rx\s+bin)[\s:]*(\d+)",
+    "rx_pcn": r"(?:pcn|rx\s+pcn)[\s:]*([A-Za-z0-9]+)"
+})
+
+# Back of an insurance card
+_CARD_BACK_PATTERNS = _compile_patterns({
+    "customer_service": r"(?:customer\s+service|help\s+line|phone)[\s:]*(\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})",
+    "claims_address": r"(?:claims|send\s+claims\s+to)[\s:]*([0-9]+\s+[A-Za-z\s,]+\d{5})",
+    "website": r"(www\.[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})",
+    "precertification": r"(?:precert|pre-cert|authorization)[\s:]*(\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})",
+    "pharmacy_benefits": r"(?:pharmacy|rx)[\s:]*([A-Za-z\s]+)",
+    "mental_health": r"(?:mental\s+health|behavioral)[\s:]*(\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})"
+})
+
+
+def _extract_fields(patterns: Dict[str, "re.Pattern[str]"], text: str) -> Dict[str, str]:
+    """First match of each field pattern in the text"""
+    extracted = {}
+    for field, pattern in patterns.items():
+        match = pattern.search(text)
+        if match:
+            extracted[field] = match.group(1).strip()
+    
+    return extracted
+
+
+def _text_from_data(data: Dict[str, List[Any]]) -> str:
+    """Rebuild page text from Tesseract word data: one line per text line, blank line between paragraphs"""
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    for i, word in enumerate(data["text"]):
+        if word and word.strip():
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word)
+    
+    parts = []
+    paragraph = None
+    for (block, par, _), words in lines.items():
+        if paragraph is not None and (block, par) != paragraph:
+            parts.append("")
+        parts.append(" ".join(words))
+        paragraph = (block, par)
+    
+    return "\n".join(parts)
+
+
+def _file_digest(path: str) -> bytes:
+    """BLAKE2b of the file contents, reusing the last hash while size and mtime are unchanged"""
+    st = os.stat(path)
+    stat_key = (path, st.st_size, st.st_mtime_ns)
+    with _ocr_cache_lock:
+        digest = _digest_by_stat.get(stat_key)
+    if digest is not None:
+        return digest
+    
+    with open(path, "rb") as f:
+        digest = hashlib.blake2b(f.read(), digest_size=16).digest()
+    
+    with _ocr_cache_lock:
+        _digest_by_stat[stat_key] = digest
+        while len(_digest_by_stat) > OCR_CACHE_SIZE:
+            _digest_by_stat.popitem(last=False)
+    return digest
+
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an OCR result that shares no mutable state with the original"""
+    return {**result, "extracted_fields": dict(result["extracted_fields"])}
+
+
+def _cache_get(key: Tuple[bytes, str]) -> Optional[Dict[str, Any]]:
+    """Copy of the cached OCR result for an image digest and document type"""
+    with _ocr_cache_lock:
+        result = _ocr_cache.get(key)
+        if result is None:
+            return None
+        _ocr_cache.move_to_end(key)
+    return _copy_result(result)
+
+
+def _cache_put(key: Tuple[bytes, str], result: Dict[str, Any]) -> None:
+    """Store a copy of an OCR result, evicting the least recently used past the size limit"""
+    result = _copy_result(result)
+    with _ocr_cache_lock:
+        _ocr_cache[key] = result
+        _ocr_cache.move_to_end(key)
+        while len(_ocr_cache) > OCR_CACHE_SIZE:
+            _ocr_cache.popitem(last=False)
+
+
+def _use_engine() -> bool:
+    """Whether the in-process engine is configured and installed"""
+    global _engine_warned
+    if settings.OCR_BACKEND != "rapidocr":
+        return False
+    if not _ocr_engine.rapidocr_available:
+        if not _engine_warned:
+            logger.warning("OCR_BACKEND is rapidocr but rapidocr_onnxruntime is not installed; using Tesseract")
+            _engine_warned = True
+        return False
+    return True
+
+
+def _ocr_error(e: Exception) -> Dict[str, Any]:
+    """Error result for a document that could not be processed"""
+    error_msg = f"OCR processing failed: {str(e)}"
+    logger.error(error_msg)
+    return {"error": error_msg, "text": "", "confidence": 0}
+
 
 class OCRTool(BaseTool):
     """Tool for extracting text from documents using OCR"""
@@ -30,49 +208,88 @@ class OCRTool(BaseTool):
     def _run(self, document_path: str, document_type: str = "general") -> str:
         """Extract text from document using OCR"""
         try:
-            # Load and preprocess image
-            image = self._preprocess_image(document_path)
-            
-            # Configure OCR based on document type
-            config = self._get_ocr_config(document_type)
-            
-            # Perform OCR
-            extracted_text = pytesseract.image_to_string(image, config=config)
-            
-            # Get confidence scores
-            data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-            confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-            
-            result = {
-                "text": extracted_text.strip(),
-                "confidence": round(avg_confidence, 2),
-                "document_type": document_type,
-                "extracted_fields": self._extract_structured_data(extracted_text, document_type)
-            }
-            
-            logger.info(f"OCR completed for {document_type} with {avg_confidence:.1f}% confidence")
-            return json.dumps(result, indent=2)
+            return orjson.dumps(self._ocr_document(document_path, document_type), option=DUMP_OPTS).decode()
             
         except Exception as e:
-            error_msg = f"OCR processing failed: {str(e)}"
-            logger.error(error_msg)
-            return json.dumps({"error": error_msg, "text": "", "confidence": 0})
+            return orjson.dumps(_ocr_error(e)).decode()
+    
+    def run_batch(self, document_paths: List[str], document_type: str = "general") -> List[Dict[str, Any]]:
+        """OCR several documents concurrently, returning results in input order"""
+        def ocr_one(document_path: str) -> Dict[str, Any]:
+            try:
+                return self._ocr_document(document_path, document_type)
+            except Exception as e:
+                return _ocr_error(e)
+        
+        return list(_ocr_executor.map(ocr_one, document_paths))
+    
+    def _ocr_document(self, document_path: str, document_type: str) -> Dict[str, Any]:
+        """Preprocess, OCR and extract fields from one document"""
+        # The same image is often OCR'd again (card front/back passes, retries)
+        cache_key = (_file_digest(document_path), document_type)
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            logger.debug(f"OCR cache hit for {document_path}")
+            return cached
+        
+        if document_type in _ENGINE_DOCUMENT_TYPES and _use_engine():
+            extracted_text, avg_confidence = _ocr_engine.recognize(document_path)
+        else:
+            extracted_text, avg_confidence = self._tesseract(document_path, document_type)
+        
+        result = {
+            "text": extracted_text.strip(),
+            "confidence": round(avg_confidence, 2),
+            "document_type": document_type,
+            "extracted_fields": self._extract_structured_data(extracted_text, document_type)
+        }
+        
+        logger.info(f"OCR completed for {document_type} with {avg_confidence:.1f}% confidence")
+        _cache_put(cache_key, result)
+        return result
+    
+    def _tesseract(self, document_path: str, document_type: str) -> Tuple[str, float]:
+        """Preprocess and OCR a document with Tesseract, returning text and mean confidence"""
+        import pytesseract
+        
+        # Load and preprocess image
+        image = self._preprocess_image(document_path, document_type)
+        
+        # Configure OCR based on document type
+        config = self._get_ocr_config(document_type)
+        
+        # Perform OCR once; the word table gives both the text and the confidence scores
+        data = pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+        extracted_text = _text_from_data(data)
+        
+        # Get confidence scores
+        confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
+        avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+        
+        return extracted_text, avg_confidence
     
-    def _preprocess_image(self, image_path: str) -> np.ndarray:
+    def _preprocess_image(self, image_path: str, document_type: str = "general") -> "np.ndarray":
         """Preprocess image for better OCR results"""
-        # Read image
-        image = cv2.imread(image_path)
+        import cv2
+        
+        # Decode straight to grayscale rather than reading BGR and converting
+        gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise FileNotFoundError(f"Could not read image: {image_path}")
         
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        # Apply noise reduction, unless the Laplacian variance says the scan is already clean
+        if cv2.Laplacian(gray, cv2.CV_64F).var() >= NOISE_VARIANCE_THRESHOLD:
+            gray = cv2.medianBlur(gray, 3)
         
-        # Apply noise reduction
-        denoised = cv2.medianBlur(gray, 3)
+        # A high-contrast page separates cleanly with one global Otsu threshold, which is
+        # much cheaper than the adaptive Gaussian pass; unevenly lit photos keep the latter
+        if gray.std() > GLOBAL_THRESHOLD_MIN_STD:
+            _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+            return thresh
         
         # Apply adaptive thresholding
         thresh = cv2.adaptiveThreshold(
-            denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
         )
         
         return thresh
@@ -101,44 +318,11 @@ class OCRTool(BaseTool):
     
     def _extract_patient_fields(self, text: str) -> Dict[str, str]:
         """Extract patient information from intake form text"""
-        patterns = {
-            "first_name": r"(?:first\s+name|fname)[\s:]*([A-Za-z]+)",
-            "last_name": r"(?:last\s+name|lname|surname)[\s:]*([A-Za-z]+)",
-            "date_of_birth": r"(?:dob|date\s+of\s+birth|birth\s+date)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
-            "phone": r"(?:phone|telephone|tel)[\s:]*(\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})",
-            "email": r"(?:email|e-mail)[\s:]*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})",
-            "address": r"(?:address|street)[\s:]*([0-9]+\s+[A-Za-z\s]+)",
-            "city": r"(?:city)[\s:]*([A-Za-z\s]+)",
-            "state": r"(?:state)[\s:]*([A-Z]{2})",
-            "zip_code": r"(?:zip|postal|zip\s+code)[\s:]*(\d{5}(?:-\d{4})?)"
-        }
-        
-        extracted = {}
-        for field, pattern in patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                extracted[field] = match.group(1).strip()
-        
-        return extracted
+        return _extract_fields(_PATIENT_PATTERNS, text)
     
     def _extract_insurance_fields(self, text: str) -> Dict[str, str]:
         """Extract insurance information from card text"""
-        patterns = {
-            "member_id": r"(?:member\s+id|id\s+number|member\s+#)[\s:]*([A-Za-z0-9]+)",
-            "group_number": r"(?:group\s+number|group\s+#|grp)[\s:]*([A-Za-z0-9]+)",
-            "plan_name": r"(?:plan|insurance)[\s:]*([A-Za-z\s]+)",
-            "effective_date": r"(?:effective|eff\s+date)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
-            "copay": r"(?:copay|co-pay)[\s:]*\$?(\d+)",
-            "deductible": r"(?:deductible|ded)[\s:]*\$?(\d+)"
-        }
-        
-        extracted = {}
-        for field, pattern in patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                extracted[field] = match.group(1).strip()
-        
-        return extracted
+        return _extract_fields(_INSURANCE_PATTERNS, text)
 
 
 class InsuranceCardTool(BaseTool):
@@ -156,7 +340,7 @@ class InsuranceCardTool(BaseTool):
         try:
             # Parse input
             if isinstance(input_data, str):
-                data = json.loads(input_data)
+                data = orjson.loads(input_data)
             else:
                 data = input_data
             
@@ -164,11 +348,11 @@ class InsuranceCardTool(BaseTool):
             side = data.get("side", "front")
             
             if not image_path:
-                return json.dumps({"error": "Image path is required"})
+                return orjson.dumps({"error": "Image path is required"}).decode()
             
             # Use OCR tool to extract text
             ocr_tool = OCRTool()
-            ocr_result = json.loads(ocr_tool._run(image_path, "insurance_card"))
+            ocr_result = orjson.loads(ocr_tool._run(image_path, "insurance_card"))
             
             # Extract side-specific information
             if side == "front":
@@ -184,49 +368,17 @@ class InsuranceCardTool(BaseTool):
             }
             
             logger.info(f"Insurance card {side} processed successfully")
-            return json.dumps(result, indent=2)
+            return orjson.dumps(result, option=DUMP_OPTS).decode()
             
         except Exception as e:
             error_msg = f"Insurance card processing failed: {str(e)}"
             logger.error(error_msg)
-            return json.dumps({"error": error_msg})
+            return orjson.dumps({"error": error_msg}).decode()
     
     def _extract_front_info(self, text: str) -> Dict[str, str]:
         """Extract information from front of insurance card"""
-        patterns = {
-            "insurance_company": r"([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s*(?:Health|Insurance|Medical)",
-            "member_name": r"(?:member|name)[\s:]*([A-Z][a-z]+\s+[A-Z][a-z]+)",
-            "member_id": r"(?:member\s+id|id|member\s+#)[\s:]*([A-Za-z0-9-]+)",
-            "group_number": r"(?:group|grp)[\s:]*([A-Za-z0-9-]+)",
-            "plan_type": r"(?:plan|type)[\s:]*([A-Za-z\s]+)",
-            "effective_date": r"(?:effective|eff)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
-            "rx_bin": r"(?:bin|rx\s+bin)[\s:]*(\d+)",
-            "rx_pcn": r"(?:pcn|rx\s+pcn)[\s:]*([A-Za-z0-9]+)"
-        }
-        
-        extracted = {}
-        for field, pattern in patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                extracted[field] = match.group(1).strip()
-        
-        return extracted
+        return _extract_fields(_CARD_FRONT_PATTERNS, text)
     
     def _extract_back_info(self, text: str) -> Dict[str, str]:
         """Extract information from back of insurance card"""
-        patterns = {
-            "customer_service": r"(?:customer\s+service|help\s+line|phone)[\s:]*(\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})",
-            "claims_address": r"(?:claims|send\s+claims\s+to)[\s:]*([0-9]+\s+[A-Za-z\s,]+\d{5})",
-            "website": r"(www\.[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})",
-            "precertification": r"(?:precert|pre-cert|authorization)[\s:]*(\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})",
-            "pharmacy_benefits": r"(?:pharmacy|rx)[\s:]*([A-Za-z\s]+)",
-            "mental_health": r"(?:mental\s+health|behavioral)[\s:]*(\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})"
-        }
-        
-        extracted = {}
-        for field, pattern in patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                extracted[field] = match.group(1).strip()
-        
-        return extracted 
\ No newline at end of file
+        return _extract_fields(_CARD_BACK_PATTERNS, text)
@@ -2,50 +2,23 @@
 Utility modules for the AI Medical Billing Application
 """
 
-from .logging import get_logger, setup_logging, SecurityLogger
-
-# Optional imports - these modules may not exist yet
-try:
-    from .ocr import OCRProcessor
-    _ocr_available = True
-except ImportError:
-    OCRProcessor = None
-    _ocr_available = False
-
-try:
-    from .validation import DataValidator
-    _validation_available = True
-except ImportError:
-    DataValidator = None
-    _validation_available = False
+import importlib
+import importlib.util
+from typing import Any
 
-try:
-    from .eligibility import EligibilityChecker
-    _eligibility_available = True
-except ImportError:
-    EligibilityChecker = None
-    _eligibility_available = False
-
-try:
-    from .fhir import FHIRClient
-    _fhir_available = True
-except ImportError:
-    FHIRClient = None
-    _fhir_available = False
-
-try:
-    from .encryption import EncryptionManager
-    _encryption_available = True
-except ImportError:
-    EncryptionManager = None
-    _encryption_available = False
+from .logging import get_logger, setup_logging, SecurityLogger
 
-try:
-    from .audit import AuditLogger
-    _audit_available = True
-except ImportError:
-    AuditLogger = None
-    _audit_available = False
+# Optional modules - these may not exist yet. Only probed here; each is
+# imported the first time one of its names is accessed, so importing a
+# lightweight helper such as app.utils.http doesn't load them all.
+_LAZY = {
+    "OCRProcessor": ".ocr",
+    "DataValidator": ".validation",
+    "EligibilityChecker": ".eligibility",
+    "FHIRClient": ".fhir",
+    "EncryptionManager": ".encryption",
+    "AuditLogger": ".audit"
+}
 
 __all__ = [
     "get_logger",
@@ -54,15 +27,20 @@ __all__ = [
 ]
 
 # Add optional modules if available
-if _ocr_available:
-    __all__.append("OCRProcessor")
-if _validation_available:
-    __all__.append("DataValidator")
-if _eligibility_available:
-    __all__.append("EligibilityChecker")
-if _fhir_available:
-    __all__.append("FHIRClient")
-if _encryption_available:
-    __all__.append("EncryptionManager")
-if _audit_available:
-    __all__.append("AuditLogger") 
\ No newline at end of file
+__all__.extend(
+    name for name, module in _LAZY.items()
+    if importlib.util.find_spec(module, __name__) is not None
+)
+
+
+def __getattr__(name: str) -> Any:
+    """Import optional utilities on first access; missing modules resolve to None"""
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    try:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    except ImportError:
+        value = None
+    globals()[name] = value
+    return value
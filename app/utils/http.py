@@ -0,0 +1,66 @@
+"""
+Shared aiohttp sessions for calls to external services
+"""
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict
+
+import orjson
+
+from app.utils.logging import get_logger
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+logger = get_logger("utils.http")
+
+# Connection pool shared by every clearinghouse/payer call on a loop
+POOL_LIMIT = 100
+POOL_LIMIT_PER_HOST = 10
+KEEPALIVE_TIMEOUT = 30
+
+REQUEST_TIMEOUT = 30
+CONNECT_TIMEOUT = 5
+
+
+def _dumps(obj: Any) -> str:
+    """Request body serializer; aiohttp expects str"""
+    return orjson.dumps(obj).decode()
+
+
+# One session per event loop: a session and its connector are bound to the
+# loop that created them. Creation has no await between the lookup and the
+# store, so coroutines on the same loop cannot race to build two sessions.
+_sessions: Dict[asyncio.AbstractEventLoop, "aiohttp.ClientSession"] = {}
+
+
+def get_session() -> "aiohttp.ClientSession":
+    """Return the keep-alive session for the running loop, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        # Imported on first use so processes that never call out don't load aiohttp
+        import aiohttp
+        
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=POOL_LIMIT,
+                limit_per_host=POOL_LIMIT_PER_HOST,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                enable_cleanup_closed=True
+            ),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+            json_serialize=_dumps
+        )
+        _sessions[loop] = session
+        logger.debug("Created shared HTTP session")
+    return session
+
+
+async def close_session() -> None:
+    """Close the running loop's session, if one was created"""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
@@ -4,6 +4,8 @@ Logging utilities with HIPAA compliance and structured logging
 
 import logging
 import logging.handlers
+import os
+import stat
 import structlog
 import sys
 from datetime import datetime
@@ -13,38 +15,70 @@ from pathlib import Path
 from app.config import settings
 
 
+# Fields that should be redacted
+_PHI_FIELDS = frozenset({
+    'ssn', 'social_security_number', 'social_security',
+    'phone', 'phone_number', 'telephone',
+    'email', 'email_address',
+    'address', 'address_line_1', 'address_line_2',
+    'city', 'state', 'zip_code', 'zipcode',
+    'first_name', 'last_name', 'middle_name',
+    'date_of_birth', 'dob', 'birth_date',
+    'medical_record_number', 'mrn',
+    'patient_id', 'member_id', 'subscriber_id',
+    'policy_number', 'group_number'
+})
+
+
 def sanitize_log_data(data: Dict[str, Any]) -> Dict[str, Any]:
     """Remove PHI from log data"""
     
-    # Fields that should be redacted
-    phi_fields = {
-        'ssn', 'social_security_number', 'social_security',
-        'phone', 'phone_number', 'telephone',
-        'email', 'email_address',
-        'address', 'address_line_1', 'address_line_2',
-        'city', 'state', 'zip_code', 'zipcode',
-        'first_name', 'last_name', 'middle_name',
-        'date_of_birth', 'dob', 'birth_date',
-        'medical_record_number', 'mrn',
-        'patient_id', 'member_id', 'subscriber_id',
-        'policy_number', 'group_number'
-    }
-    
     sanitized = {}
     
-    for key, value in data.items():
-        if key.lower() in phi_fields:
-            sanitized[key] = "[REDACTED]"
-        elif isinstance(value, dict):
-            sanitized[key] = sanitize_log_data(value)
-        elif isinstance(value, list):
-            sanitized[key] = [sanitize_log_data(item) if isinstance(item, dict) else item for item in value]
-        else:
-            sanitized[key] = value
+    # Nested dicts are copied with an explicit stack of (source, copy) pairs
+    # rather than recursion; each copy is linked into its parent before it is
+    # filled, so key order matches the input
+    stack = [(data, sanitized)]
+    while stack:
+        source, target = stack.pop()
+        for key, value in source.items():
+            # Log keys are nearly always lowercase already; only fold the rest
+            if (key if key.islower() else key.lower()) in _PHI_FIELDS:
+                target[key] = "[REDACTED]"
+            elif isinstance(value, dict):
+                target[key] = child = {}
+                stack.append((value, child))
+            elif isinstance(value, list):
+                items = []
+                for item in value:
+                    if isinstance(item, dict):
+                        child = {}
+                        stack.append((item, child))
+                        items.append(child)
+                    else:
+                        items.append(item)
+                target[key] = items
+            else:
+                target[key] = value
     
     return sanitized
 
 
+def sanitize_phi(logger, method_name, event_dict):
+    """Redact PHI from log entries; runs after level filtering, so dropped events skip the scan"""
+    return sanitize_log_data(event_dict)
+
+
+def _processor_sanitizes() -> bool:
+    """Whether structlog is configured with sanitize_phi (i.e. setup_logging has run)"""
+    return structlog.is_configured() and sanitize_phi in structlog.get_config()["processors"]
+
+
+def _sanitize_unless_configured(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Fail-safe for the logger wrappers: sanitize here unless the processor will"""
+    return data if _processor_sanitizes() else sanitize_log_data(data)
+
+
 def add_audit_info(logger, method_name, event_dict):
     """Add audit information to log entries"""
     event_dict['audit_timestamp'] = datetime.utcnow().isoformat()
@@ -58,6 +92,58 @@ def add_audit_info(logger, method_name, event_dict):
     return event_dict
 
 
+class SizeTrackingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that keeps a running count of the file size
+    
+    The stdlib handler stats the log path and seeks to the end of the file on
+    every record to decide whether to roll over. This one counts what it
+    writes and only re-reads the size with fstat every ``resync_interval``
+    records, which still picks up writes from other worker processes.
+    """
+    
+    resync_interval = 128
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._size: Optional[int] = None
+        self._since_sync = 0
+        self._regular_file = True
+    
+    def _sync_size(self):
+        """Read the size and type of the open log file"""
+        st = os.fstat(self.stream.fileno())
+        self._size = st.st_size
+        self._regular_file = stat.S_ISREG(st.st_mode)
+        self._since_sync = 0
+    
+    def shouldRollover(self, record):
+        """Check whether the record would take the file past maxBytes"""
+        if self.stream is None:
+            self.stream = self._open()
+        if self.maxBytes <= 0:
+            return False
+        
+        if self._size is None or self._since_sync >= self.resync_interval:
+            self._sync_size()
+        # Never roll over anything other than regular files (bpo-45401)
+        if not self._regular_file:
+            return False
+        
+        # Same estimate as the stdlib handler: formatted length plus newline
+        msg_len = len(self.format(record)) + 1
+        if self._size + msg_len >= self.maxBytes:
+            return True
+        
+        self._size += msg_len
+        self._since_sync += 1
+        return False
+    
+    def doRollover(self):
+        """Roll over and re-read the size of the fresh file on the next record"""
+        super().doRollover()
+        self._size = None
+
+
 def setup_logging():
     """Setup structured logging with HIPAA compliance"""
     
@@ -69,6 +155,7 @@ def setup_logging():
     structlog.configure(
         processors=[
             structlog.stdlib.filter_by_level,
+            sanitize_phi,
             structlog.stdlib.add_logger_name,
             structlog.stdlib.add_log_level,
             structlog.stdlib.PositionalArgumentsFormatter(),
@@ -95,7 +182,7 @@ def setup_logging():
     root_logger = logging.getLogger()
     
     # Application log file
-    app_handler = logging.handlers.RotatingFileHandler(
+    app_handler = SizeTrackingRotatingFileHandler(
         log_dir / "app.log",
         maxBytes=10 * 1024 * 1024,  # 10MB
         backupCount=5,
@@ -106,7 +193,7 @@ def setup_logging():
     root_logger.addHandler(app_handler)
     
     # Error log file
-    error_handler = logging.handlers.RotatingFileHandler(
+    error_handler = SizeTrackingRotatingFileHandler(
         log_dir / "error.log",
         maxBytes=10 * 1024 * 1024,  # 10MB
         backupCount=10,
@@ -117,7 +204,7 @@ def setup_logging():
     root_logger.addHandler(error_handler)
     
     # Audit log file (for HIPAA compliance)
-    audit_handler = logging.handlers.RotatingFileHandler(
+    audit_handler = SizeTrackingRotatingFileHandler(
         log_dir / "audit.log",
         maxBytes=50 * 1024 * 1024,  # 50MB
         backupCount=50,  # Keep more audit logs
@@ -132,7 +219,7 @@ def setup_logging():
     audit_logger.setLevel(logging.INFO)
     
     # Agent execution log
-    agent_handler = logging.handlers.RotatingFileHandler(
+    agent_handler = SizeTrackingRotatingFileHandler(
         log_dir / "agents.log",
         maxBytes=25 * 1024 * 1024,  # 25MB
         backupCount=10,
@@ -168,28 +255,23 @@ class HIPAACompliantLogger:
     
     def info(self, message: str, **kwargs):
         """Log info message with PHI sanitization"""
-        sanitized_kwargs = sanitize_log_data(kwargs)
-        self.logger.info(message, **sanitized_kwargs)
+        self.logger.info(message, **_sanitize_unless_configured(kwargs))
     
     def warning(self, message: str, **kwargs):
         """Log warning message with PHI sanitization"""
-        sanitized_kwargs = sanitize_log_data(kwargs)
-        self.logger.warning(message, **sanitized_kwargs)
+        self.logger.warning(message, **_sanitize_unless_configured(kwargs))
     
     def error(self, message: str, **kwargs):
         """Log error message with PHI sanitization"""
-        sanitized_kwargs = sanitize_log_data(kwargs)
-        self.logger.error(message, **sanitized_kwargs)
+        self.logger.error(message, **_sanitize_unless_configured(kwargs))
     
     def debug(self, message: str, **kwargs):
         """Log debug message with PHI sanitization"""
-        sanitized_kwargs = sanitize_log_data(kwargs)
-        self.logger.debug(message, **sanitized_kwargs)
+        self.logger.debug(message, **_sanitize_unless_configured(kwargs))
     
     def critical(self, message: str, **kwargs):
         """Log critical message with PHI sanitization"""
-        sanitized_kwargs = sanitize_log_data(kwargs)
-        self.logger.critical(message, **sanitized_kwargs)
+        self.logger.critical(message, **_sanitize_unless_configured(kwargs))
     
     def audit(self, event_type: str, details: Dict[str, Any], user_id: str = None, 
              ip_address: str = None, user_agent: str = None):
@@ -204,7 +286,8 @@ class HIPAACompliantLogger:
             'logger_name': self.name
         }
         
-        # Use the audit logger
+        # Use the audit logger; it is a plain stdlib logger outside the structlog
+        # processors, so details are sanitized here
         audit_logger = logging.getLogger('audit')
         audit_logger.info(f"AUDIT: {event_type}", extra=audit_data)
         
@@ -228,17 +311,15 @@ class PerformanceLogger:
         }
         
         if details:
-            log_data.update(sanitize_log_data(details))
+            log_data.update(_sanitize_unless_configured(details))
         
         self.logger.info(f"Performance: {operation}", **log_data)
     
     def log_agent_metrics(self, agent_type: str, metrics: Dict[str, Any]):
         """Log agent performance metrics"""
-        sanitized_metrics = sanitize_log_data(metrics)
-        
         self.logger.info(f"Agent Metrics: {agent_type}", 
                         agent_type=agent_type, 
-                        metrics=sanitized_metrics,
+                        metrics=_sanitize_unless_configured(metrics),
                         timestamp=datetime.utcnow().isoformat())
 
 
@@ -262,7 +343,7 @@ class SecurityLogger:
         }
         
         if details:
-            log_data.update(sanitize_log_data(details))
+            log_data.update(_sanitize_unless_configured(details))
         
         level = "info" if success else "warning"
         getattr(self.logger, level)(f"Security: {event_type}", **log_data)
@@ -281,7 +362,7 @@ class SecurityLogger:
         }
         
         if details:
-            log_data.update(sanitize_log_data(details))
+            log_data.update(_sanitize_unless_configured(details))
         
         level = "info" if success else "warning"
         getattr(self.logger, level)(f"Access: {action} on {resource}", **log_data) 
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Background event loop for running coroutines from synchronous code
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+from app.utils.logging import get_logger
+from app.utils.http import close_session
+
+
+logger = get_logger("utils.loop")
+
+T = TypeVar("T")
+
+# One long-lived loop shared by every synchronous caller, so connection pools,
+# caches and batchers bound to it survive between calls
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return the background loop, starting its thread on first use"""
+    global _loop, _thread
+    loop = _loop
+    if loop is not None:
+        return loop
+
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="background-loop", daemon=True)
+            _thread.start()
+            logger.info("Started background event loop")
+        return _loop
+
+
+def submit(coro: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+    """Schedule ``coro`` on the background loop"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def run(coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+    """Run ``coro`` on the background loop and block until it finishes"""
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("run() called from the background loop; await the coroutine instead")
+    return submit(coro).result(timeout)
+
+
+def shutdown(timeout: float = 5.0) -> None:
+    """Close the background loop's HTTP session, cancel its tasks and stop it"""
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop = _thread = None
+    if loop is None:
+        return
+
+    try:
+        asyncio.run_coroutine_threadsafe(_drain(), loop).result(timeout)
+    except Exception as e:
+        logger.warning(f"Failed to drain background loop: {str(e)}")
+
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout)
+    if not thread.is_alive():
+        loop.close()
+    logger.info("Stopped background event loop")
+
+
+async def _drain() -> None:
+    """Release loop-bound resources before the loop stops"""
+    await close_session()
+
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.get_running_loop().shutdown_asyncgens()